@@ -0,0 +1,185 @@
+"""Benchmark harness for the farm model and the Streamlit app.
+
+    python benchmarks/bench_farm.py                           # run and print results
+    python benchmarks/bench_farm.py --save baseline.json      # record a baseline
+    python benchmarks/bench_farm.py --compare baseline.json   # flag regressions (exit code 1)
+
+The calculation core is timed at 1, 1k and 1M scenarios and the portfolio engine at 5k member farms. The app
+is driven headlessly with Streamlit's AppTest: the first run of a new session, a rerun after a Full Farm input
+changes, a rerun after an Isolated Calculations input changes and a rerun with every chart toggled on (charts
+are hidden by default). AppTest always reruns the whole script, never a single fragment, so
+``app.full_rerun_isolated_input`` measures a full rerun whose only change is an isolated input (every other
+section is served from the caches), not the fragment rerun a browser session would do. The Streamlit caches
+are cleared before every app repeat, so the results cache starts empty; modules imported by the first repeat
+stay loaded, so ``first_s`` reports that repeat separately. Each benchmark records the best wall time over its
+repeats, the peak traced memory of one extra run and, for app runs, the per-phase timings reported by the
+app's profiler.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import numpy as np  # noqa: E402
+
+from farm_model import calculate_farm_metrics, calculate_farm_metrics_batch, constant_ranges  # noqa: E402
+from farm_portfolio import simulate_portfolio  # noqa: E402
+
+APP_PATH = os.path.join(REPO_ROOT, "farm_calculator_app.py")
+CORE_SIZES = [1, 1_000, 1_000_000]
+PORTFOLIO_FARMS = 5_000
+
+
+def measure(function, repeats):
+    """Best and median wall time over ``repeats`` calls, plus peak traced memory of one extra call."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"wall_s": min(times), "median_s": statistics.median(times), "peak_mb": peak / 2**20, "repeats": repeats}
+
+
+def scenario_arrays(n, seed=0):
+    rng = np.random.default_rng(seed)
+    design = {
+        "cows": rng.integers(1, 51, n) * 10.0,
+        "deeded_ha": rng.integers(10, 201, n).astype(float),
+        "grassland_ha": rng.integers(0, 101, n).astype(float),
+        "greenhouse_ha": rng.uniform(0.01, 10, n)
+    }
+    constants = {name: rng.uniform(low, high, n) for name, (low, mid, high) in constant_ranges().items()}
+    return design, constants
+
+
+def bench_core(repeats):
+    results = {"core.scalar": measure(lambda: calculate_farm_metrics(100, 51, 35, 1.5), repeats * 100)}
+    for n in CORE_SIZES:
+        design, constants = scenario_arrays(n)
+        result = measure(lambda: calculate_farm_metrics_batch(**design, **constants), repeats if n > 1000 else repeats * 10)
+        result["scenarios_per_s"] = n / result["wall_s"]
+        results[f"core.batch.{n}"] = result
+    design, constants = scenario_arrays(PORTFOLIO_FARMS)
+    farms = [dict(zip(design, values)) for values in zip(*design.values())]
+    result = measure(lambda: simulate_portfolio(farms, return_daily=True), repeats)
+    result["farms_per_s"] = PORTFOLIO_FARMS / result["wall_s"]
+    results[f"core.portfolio.{PORTFOLIO_FARMS}"] = result
+    return results
+
+
+def bench_app(repeats):
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    chart_toggles = ["show_revenue_chart", "show_cost_chart", "show_projection_chart", "show_daily_electricity_chart",
+                     "show_cash_flow_chart", "show_tornado_chart", "show_portfolio_chart"]
+    scenarios = {
+        "app.new_session": [],
+        "app.rerun_farm_input": [("number_input", "farm_cows", 200)],
+        "app.full_rerun_isolated_input": [("number_input", "iso_cows", 200)],
+        "app.show_all_charts": [("toggle", key, True) for key in chart_toggles]
+    }
+
+    def run(name, changes, trace=False):
+        # Shared caches outlive an AppTest, so clear them to start every repeat from a cold server
+        st.cache_resource.clear()
+        st.cache_data.clear()
+        app = AppTest.from_file(APP_PATH, default_timeout=300)
+        if changes:
+            app.run()
+            for widget, key, value in changes:
+                getattr(app, widget)(key=key).set_value(value)
+        if trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+        app.run()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace else 0
+        tracemalloc.stop()
+        if app.exception:
+            raise RuntimeError(f"{name}: app raised {app.exception}")
+        return elapsed, peak, app.session_state["phase_timings"]
+
+    results = {}
+    for name, changes in scenarios.items():
+        times, phases = [], []
+        for _ in range(repeats):
+            elapsed, _, timings = run(name, changes)
+            times.append(elapsed)
+            phases.append(timings)
+        best = int(np.argmin(times))
+        results[name] = {"wall_s": times[best], "median_s": statistics.median(times), "first_s": times[0],
+                         "peak_mb": run(name, changes, trace=True)[1] / 2**20, "repeats": repeats,
+                         "phases_ms": {phase: seconds * 1000 for phase, seconds in phases[best].items()}}
+    return results
+
+
+def compare(results, baseline, threshold):
+    """``(benchmark, metric, before, after)`` for every wall time or peak memory more than ``threshold`` above the baseline."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get("results", {}).get(name, {})
+        for metric in ("wall_s", "peak_mb"):
+            if metric in result and metric in reference and result[metric] > reference[metric] * (1 + threshold):
+                regressions.append((name, metric, reference[metric], result[metric]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5, help="Timed repeats per benchmark (default: 5)")
+    parser.add_argument("--core-only", action="store_true", help="Skip the Streamlit app benchmarks")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a JSON baseline and exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before flagging (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    results = bench_core(args.repeats)
+    if not args.core_only:
+        results.update(bench_app(args.repeats))
+
+    for name, result in results.items():
+        line = f"{name:<28} {result['wall_s'] * 1000:>10.3f} ms"
+        if "peak_mb" in result:
+            line += f" {result['peak_mb']:>9.1f} MB"
+        if "scenarios_per_s" in result:
+            line += f" {result['scenarios_per_s']:>14,.0f} scenarios/s"
+        if "first_s" in result:
+            line += f"   first repeat {result['first_s'] * 1000:,.0f} ms"
+        if "farms_per_s" in result:
+            line += f" {result['farms_per_s']:>14,.0f} farms/s"
+        print(line)
+        for phase, ms in result.get("phases_ms", {}).items():
+            print(f"    {phase:<24} {ms:>10.3f} ms")
+
+    report = {
+        "environment": {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+                        "cpu_count": os.cpu_count()},
+        "results": results
+    }
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for name, metric, before, after in regressions:
+            print(f"REGRESSION {name} {metric}: {before:.6g} -> {after:.6g}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Headless batch evaluation: stream a CSV or Parquet file of scenarios through the farm model to Parquet.
+
+    python farm_batch.py scenarios.csv results.parquet --chunk-size 100000 --workers 4
+
+Each row is one scenario. Columns named after the app inputs (see ``DESIGN_DEFAULTS`` and
+``farm_model.CONSTANT_RANGES``) override the defaults; missing columns or empty cells fall back to the
+app defaults, with the product yield/price Mid values chosen per row from the ``product`` column.
+Any other columns (e.g. a scenario id) are passed through ahead of the result columns. Parquet input keeps its
+types; in CSV input each such column gets the type pandas would infer reading the whole file (integer, float,
+boolean or text), which costs one extra pass over those columns.
+With ``--cash-flow-years`` each row also gets its NPV, IRR and payback from the long-horizon cash-flow engine.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from farm_cashflow import DEFAULT_DISCOUNT_RATE, project_cash_flows
+from farm_model import PRODUCT_RANGES, assemble_results, constant_ranges, flatten_results, model_values
+
+# Defaults match the design widgets in the app
+DESIGN_DEFAULTS = {
+    "cows": 100,
+    "deeded_ha": 51,
+    "grassland_ha": 35,
+    "greenhouse_ha": 1.5,
+    "pct_milk": 100,
+    "pct_cheese": 0,
+    "pct_cream": 0
+}
+PRODUCT_CONSTANTS = {"yield_tons_ha": "yield", "product_price_usd": "price"}
+CASH_FLOW_COLUMNS = ["NPV (USD)", "IRR", "Payback Period (Years)", "Discounted Payback Period (Years)"]
+
+
+def evaluate_scenarios(frame, default_product="Tomato", cash_flow=None):
+    """Evaluate every row of ``frame`` and return the input columns followed by the flattened results.
+
+    ``cash_flow`` (keyword arguments for ``farm_cashflow.project_cash_flows``) adds ``Cash Flow.*`` columns.
+    """
+    products = frame["product"].fillna(default_product) if "product" in frame else pd.Series(default_product, index=frame.index)
+    unknown = set(products.unique()) - set(PRODUCT_RANGES)
+    if unknown:
+        raise ValueError(f"Unknown products: {', '.join(sorted(map(str, unknown)))}")
+
+    def column(name, default):
+        if name not in frame:
+            return np.broadcast_to(np.asarray(default, dtype=float), len(frame))
+        return pd.to_numeric(frame[name]).fillna(pd.Series(default, index=frame.index)).to_numpy(dtype=float)
+
+    design = {name: column(name, default) for name, default in DESIGN_DEFAULTS.items()}
+    constants = {}
+    for name, (low, mid, high) in constant_ranges(default_product).items():
+        if name in PRODUCT_CONSTANTS:
+            mid = products.map({product: ranges[PRODUCT_CONSTANTS[name]][1] for product, ranges in PRODUCT_RANGES.items()}).to_numpy(dtype=float)
+        constants[name] = column(name, mid)
+
+    values = model_values(**design, **constants)
+    results = pd.DataFrame(flatten_results(assemble_results(values)), index=frame.index)
+    results["Valid Allocation"] = design["pct_milk"] + design["pct_cheese"] + design["pct_cream"] == 100
+    if cash_flow is not None:
+        cash_flows = project_cash_flows(values, **cash_flow)
+        for name in CASH_FLOW_COLUMNS:
+            results[f"Cash Flow.{name}"] = cash_flows[name]
+    return pd.concat([frame, results], axis=1)
+
+
+def is_parquet(path):
+    return str(path).lower().endswith((".parquet", ".pq"))
+
+
+# Arrow type of a passthrough column -> pandas dtype it is read with
+PASSTHROUGH_DTYPES = {pa.int64(): "Int64", pa.float64(): "float64", pa.bool_(): "boolean", pa.string(): "string"}
+INFERRED_TYPES = {"integer": pa.int64(), "floating": pa.float64(), "mixed-integer-float": pa.float64(), "boolean": pa.bool_()}
+
+
+def _promote(a, b):
+    # Widen two inferred column types the way pandas would when reading both chunks at once
+    if a is None or a == b:
+        return b
+    if b is None:
+        return a
+    if {a, b} == {pa.int64(), pa.float64()}:
+        return pa.float64()
+    return pa.string()
+
+
+def input_schema(path, chunk_size=100_000):
+    """Arrow types of the input columns, fixed for the whole file so every chunk is written with the same schema.
+
+    CSV has no schema: model inputs are read as float64 and ``product`` as text. Every other column is scanned once
+    and given the type its non-empty cells share across all chunks (text if none are filled), so a column that
+    happens to be empty or integral in the first chunk does not fix the type for the rest.
+    """
+    if is_parquet(path):
+        return pq.ParquetFile(path).schema_arrow
+    numeric = set(DESIGN_DEFAULTS) | set(constant_ranges())
+    names = list(pd.read_csv(path, nrows=0).columns)
+    passthrough = {name: None for name in names if name not in numeric and name != "product"}
+    if passthrough:
+        for chunk in pd.read_csv(path, usecols=list(passthrough), chunksize=chunk_size):
+            for name in passthrough:
+                values = chunk[name].dropna()
+                if len(values):
+                    passthrough[name] = _promote(passthrough[name], INFERRED_TYPES.get(pd.api.types.infer_dtype(values), pa.string()))
+    return pa.schema([(name, pa.float64() if name in numeric else passthrough.get(name) or pa.string()) for name in names])
+
+
+def iter_scenario_chunks(path, chunk_size, schema=None):
+    """Yield DataFrames of at most ``chunk_size`` rows without loading the whole file."""
+    if is_parquet(path):
+        for record_batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield record_batch.to_pandas(types_mapper={pa.string(): pd.StringDtype()}.get)
+    else:
+        schema = schema or input_schema(path, chunk_size)
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype={field.name: PASSTHROUGH_DTYPES[field.type] for field in schema})
+
+
+def run_batch(input_path, output_path, chunk_size=100_000, workers=1, default_product="Tomato", progress=None, cash_flow=None):
+    """Stream scenarios from ``input_path`` to a Parquet file at ``output_path``; returns the row count.
+
+    At most ``2 * workers`` chunks are in flight at once and results are written in input order,
+    so memory use depends on the chunk size and worker count but not on the file size.
+    """
+    rows = 0
+    writer = None
+    schema = input_schema(input_path, chunk_size)
+
+    def write(frame):
+        nonlocal writer, rows
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if writer is None:
+            # Input columns keep the file's types; the result columns are the same for every chunk
+            fields = [schema.field(field.name) if field.name in schema.names else field for field in table.schema]
+            writer = pq.ParquetWriter(output_path, pa.schema(fields))
+        writer.write_table(table.cast(writer.schema))
+        rows += len(frame)
+        if progress:
+            progress(rows)
+
+    try:
+        chunks = iter_scenario_chunks(input_path, chunk_size, schema)
+        if workers <= 1:
+            for chunk in chunks:
+                write(evaluate_scenarios(chunk, default_product, cash_flow))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(evaluate_scenarios, chunk, default_product, cash_flow))
+                    if len(pending) >= 2 * workers:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a CSV or Parquet file of farm scenarios and write the results to Parquet.")
+    parser.add_argument("input", help="Scenario file (.csv or .parquet)")
+    parser.add_argument("output", help="Results file (.parquet)")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows per chunk (default: 100000)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes; 0 uses every CPU (default: 1)")
+    parser.add_argument("--product", default="Tomato", choices=list(PRODUCT_RANGES), help="Product for rows without a product column")
+    parser.add_argument("--cash-flow-years", type=int, metavar="YEARS", help="Add NPV, IRR and payback over this horizon")
+    parser.add_argument("--discount-rate", type=float, default=DEFAULT_DISCOUNT_RATE,
+                        help=f"Discount rate for --cash-flow-years (default: {DEFAULT_DISCOUNT_RATE})")
+    args = parser.parse_args(argv)
+    cash_flow = {"years": args.cash_flow_years, "discount_rate": args.discount_rate} if args.cash_flow_years else None
+
+    workers = args.workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    rows = run_batch(args.input, args.output, chunk_size=args.chunk_size, workers=workers, default_product=args.product,
+                     progress=lambda n: print(f"\r{n:,} scenarios", end="", file=sys.stderr), cash_flow=cash_flow)
+    print(f"\rWrote {rows:,} scenarios to {args.output} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,224 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 import numpy as np
 
-# Streamlit app title
-st.title("Integrated Farm Calculator")
+from farm_cache import ResultCache, parameter_key
+from farm_cashflow import DEFAULT_DISCOUNT_RATE, DEFAULT_GROWTH_RATES, DEFAULT_YEARS, REPLACEMENTS, REVENUE_LINES, analyze_cash_flows
+from farm_graph import FarmGraph
+from farm_model import COST_GROWTH, PRODUCT_OPTIONS, PRODUCT_RANGES, REVENUE_GROWTH, format_range
+from farm_montecarlo import CASH_FLOW_METRICS, DISTRIBUTIONS, MONTE_CARLO_METRICS, run_monte_carlo
+from farm_optimizer import OBJECTIVES, optimize_design
+from farm_portfolio import DEFAULT_DIGESTER_SCALE_EXPONENT, simulate_portfolio
+from farm_profiling import PhaseTimer, phase_rows
+from farm_seasonal import simulate_seasonal
+from farm_sensitivity import SENSITIVITY_METRICS, sobol_indices, tornado
+
+# pandas and plotly are imported where a table or chart is built, so they load only once one is shown
+
+RESULT_CACHE_SIZE = 256
+RESULT_CACHE_TTL = 3600.0
+
+
+# Worker pools shared by every session; heavy analyses run here instead of on the rerun thread
+@st.cache_resource
+def get_process_pool():
+    return ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+
+
+@st.cache_resource
+def get_background_pool():
+    return ThreadPoolExecutor(max_workers=2)
+
+
+# Results, tables and figures shared across reruns and sessions, keyed on the normalized inputs
+@st.cache_resource
+def get_result_cache():
+    return ResultCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+
+
+# Per-session incremental model: only subsystems downstream of a changed input are recomputed
+def get_farm_graph():
+    if "farm_graph" not in st.session_state:
+        st.session_state["farm_graph"] = FarmGraph()
+    return st.session_state["farm_graph"]
+
+
+# Sections rerun on their own, so each records its latest timings under its own prefix
+def record_phases(section, profiler):
+    timings = {phase: seconds for phase, seconds in st.session_state.get("phase_timings", {}).items()
+               if not phase.startswith(f"{section}: ")}
+    timings.update({f"{section}: {phase}": seconds for phase, seconds in profiler.timings.items()})
+    st.session_state["phase_timings"] = timings
+
+
+def build_farm_view(farm_graph, profiler, num_cows, deeded_land, grassland_area, greenhouse_area, pct_milk, pct_cheese, pct_cream, selected_product, constants):
+    import pandas as pd
+
+    farm_graph.update(cows=num_cows, deeded_ha=deeded_land, grassland_ha=grassland_area, greenhouse_ha=greenhouse_area,
+                      pct_milk=pct_milk, pct_cheese=pct_cheese, pct_cream=pct_cream, **constants)
+    results, warning = farm_graph.scenario_results(selected_product)
+    profiler.lap("Model")
+
+    # Basic Results Table
+    table_data = {
+        "Metric": ["Initial Investment", "Annual Operating Costs", "Annual Revenue", "Annual Profit", "Payback Period"],
+        "USD": [
+            f"${results['Investment (USD)']:,.2f}",
+            f"${results['Operating Costs (USD)']:,.2f}",
+            f"${results['Revenue (USD)']:,.2f}",
+            f"${results['Profit (USD)']:,.2f}",
+            f"{results['Payback Period (Years)']:.2f} years"
+        ],
+        "TRY": [
+            f"{results['Investment (TRY)']:,.2f}",
+            f"{results['Operating Costs (TRY)']:,.2f}",
+            f"{results['Revenue (TRY)']:,.2f}",
+            f"{results['Profit (TRY)']:,.2f}",
+            f"{results['Payback Period (Years)']:.2f} years"
+        ]
+    }
+    df_basic = pd.DataFrame(table_data)
+    profiler.lap("DataFrames")
 
-# Use tabs for organization
-tab1, tab2 = st.tabs(["Full Farm Calculator", "Isolated Calculations"])
+    return {"results": results, "warning": warning, "df_basic": df_basic}
+
+
+def build_revenue_pie(results, selected_product):
+    import plotly.express as px
+
+    return px.pie(names=['Dairy', selected_product, 'Electricity Surplus'],
+                  values=[results['Dairy Revenue Year'], results['Product Revenue Year'], max(0, results['Electricity Revenue Year'])],
+                  title="Annual Revenue Sources")
+
+
+def build_cost_pie(results):
+    import plotly.express as px
+
+    costs_dict = {
+        'Feed': results['Daily Costs']['Feed (USD)'] * 365,
+        'Labor': results['Daily Costs']['Labor (USD)'] * 365,
+        'Veterinary': results['Daily Costs']['Veterinary (USD)'] * 365,
+        'Utilities': results['Daily Costs']['Utilities (USD)'] * 365,
+        'Marketing': results['Daily Costs']['Marketing (USD)'] * 365,
+        'Greenhouse Ops': results['Daily Costs']['Greenhouse Ops (USD)'] * 365,
+        'Maintenance': results['Daily Costs']['Maintenance (USD)'] * 365,
+        'Electricity Purchase': results['Daily Costs']['Electricity Purchase (USD)'] * 365
+    }
+    return px.pie(names=list(costs_dict.keys()), values=list(costs_dict.values()), title="Annual Operating Costs")
+
+
+def build_projection_chart(results):
+    import pandas as pd
+    import plotly.express as px
+
+    projection_data = pd.DataFrame({
+        "Year": results["Projections"]["Years"],
+        "Revenue (USD)": results["Projections"]["Revenue"],
+        "Costs (USD)": results["Projections"]["Costs"],
+        "Profit (USD)": results["Projections"]["Profit"]
+    })
+    return px.line(projection_data, x="Year", y=["Revenue (USD)", "Costs (USD)", "Profit (USD)"],
+                   title="5-Year Financial Projections",
+                   labels={"value": "Amount (USD)", "variable": "Metric"})
+
+
+def build_daily_electricity_chart(seasonal):
+    import pandas as pd
+    import plotly.express as px
+
+    daily = seasonal["Daily"]
+    df_daily = pd.DataFrame({
+        "Day": np.arange(1, 366),
+        "Produced (kWh)": daily["Electricity Produced (kWh/day)"][:365],
+        "Consumed (kWh)": daily["Electricity Consumed (kWh/day)"][:365],
+        "Stored (kWh)": daily["Stored Electricity (kWh)"][:365]
+    })
+    return px.line(df_daily, x="Day", y=["Produced (kWh)", "Consumed (kWh)", "Stored (kWh)"],
+                   title="Year 1 Daily Electricity Balance",
+                   labels={"value": "Electricity (kWh)", "variable": "Series"})
+
+
+def build_cash_flow_chart(cash_flow):
+    import pandas as pd
+    import plotly.express as px
+
+    df_cumulative = pd.DataFrame({
+        "Year": cash_flow["Years"],
+        "Cumulative (USD)": cash_flow["Cumulative Cash Flow (USD)"],
+        "Discounted Cumulative (USD)": np.cumsum(cash_flow["Discounted Cash Flow (USD)"])
+    })
+    return px.line(df_cumulative, x="Year", y=["Cumulative (USD)", "Discounted Cumulative (USD)"],
+                   title="Cumulative Cash Flow", labels={"value": "Amount (USD)", "variable": "Series"})
+
+
+def build_portfolio_chart(portfolio):
+    import pandas as pd
+    import plotly.express as px
+
+    daily = portfolio["Daily"]
+    df_daily = pd.DataFrame({
+        "Day": np.arange(1, 366),
+        "Produced (kWh)": daily["Electricity Produced (kWh/day)"],
+        "Consumed (kWh)": daily["Electricity Consumed (kWh/day)"],
+        "Netted Between Farms (kWh)": daily["Electricity Netted (kWh/day)"],
+        "Exported (kWh)": daily["Electricity Exported (kWh/day)"],
+        "Imported (kWh)": daily["Electricity Imported (kWh/day)"]
+    })
+    return px.line(df_daily, x="Day", y=list(df_daily.columns[1:]), title="Portfolio Daily Electricity Balance",
+                   labels={"value": "Electricity (kWh)", "variable": "Series"})
+
+
+def build_sensitivity_view(num_cows, deeded_land, grassland_area, greenhouse_area, pct_milk, pct_cheese, pct_cream, selected_product, constants):
+    import pandas as pd
+
+    sensitivity_rows = tornado(num_cows, deeded_land, grassland_area, greenhouse_area, pct_milk, pct_cheese, pct_cream,
+                               product=selected_product, base=constants)
+    df_sensitivity = pd.DataFrame([{
+        "Constant": row["Constant"],
+        "Profit at Low (USD)": f"${row['Profit (USD) at Low']:,.2f}",
+        "Profit at High (USD)": f"${row['Profit (USD) at High']:,.2f}",
+        "Profit Swing (USD)": f"${row['Profit (USD) Swing']:,.2f}",
+        "Payback at Low": f"{row['Payback Period (Years) at Low']:.2f} years",
+        "Payback at High": f"{row['Payback Period (Years) at High']:.2f} years"
+    } for row in sensitivity_rows])
+    return {"sensitivity_rows": sensitivity_rows, "df_sensitivity": df_sensitivity}
+
+
+def build_tornado_chart(sensitivity_rows):
+    import plotly.graph_objects as go
+
+    tornado_rows = sensitivity_rows[::-1]
+    profit_base = sensitivity_rows[0]["Profit (USD) at Base"]
+    fig_tornado = go.Figure()
+    for end in ["Low", "High"]:
+        fig_tornado.add_trace(go.Bar(y=[row["Constant"] for row in tornado_rows],
+                                     x=[row[f"Profit (USD) at {end}"] - profit_base for row in tornado_rows],
+                                     base=profit_base, orientation="h", name=f"At {end} Value"))
+    fig_tornado.update_layout(barmode="overlay", title="Annual Profit Sensitivity (Tornado)",
+                              xaxis_title="Annual Profit (USD)", height=max(400, 25 * len(tornado_rows)))
+    return fig_tornado
+
+
+# Charts stay collapsed until toggled on; toggling reruns only that chart, and a shown figure is cached
+@st.fragment
+def chart_section(title, key, cache_key, build_figure):
+    st.subheader(title)
+    if not st.toggle("Show chart", key=key):
+        return
+    profiler = PhaseTimer()
+    figure = get_result_cache().get_or_compute(cache_key, build_figure)
+    profiler.lap("Figure (build)")
+    st.plotly_chart(figure)
+    profiler.lap("Chart (serialize)")
+    record_phases(f"{title} Chart", profiler)
+
+
+@st.fragment
+def full_farm_tab():
+    profiler = PhaseTimer()
 
-with tab1:
     # Input section for full farm
     st.header("Input Farm Parameters")
     num_cows = st.number_input("Number of Cows", min_value=10, max_value=500, value=100, step=10, key="farm_cows")
@@ -28,24 +237,13 @@ with tab1:
         pct_cream = st.slider("Cream (%)", 0, 100, 0, key="pct_cream")
     if pct_milk + pct_cheese + pct_cream != 100:
         st.error("Allocations must sum to 100%.")
-    else:
-        # Assumptions: Cheese yield 0.1 kg/L milk (10L/kg), Cream 0.04 kg/L (4% fat)
-        # Prices: Milk $0.4/L, Cheese $5/kg, Cream $3/kg (adjustable below)
-        cheese_yield_kg_per_l = 0.1
-        cream_yield_kg_per_l = 0.04
 
     # Greenhouse product choice
     st.subheader("Greenhouse Product")
-    product_options = ["Tomato", "Lettuce", "Strawberry", "Cucumber"]
-    selected_product = st.selectbox("Select Product", product_options, key="selected_product")
-
-    # Preset ranges for product yields (tons/ha/year) and prices (USD/kg) - used for display only
-    product_ranges = {
-        "Tomato": {"yield": "Low: 100, Mid: 300, High: 600", "price": "Low: 0.1, Mid: 0.25, High: 0.4", "mid_yield": 300.0, "mid_price": 0.25},
-        "Lettuce": {"yield": "Low: 200, Mid: 350, High: 500", "price": "Low: 0.5, Mid: 1.0, High: 1.5", "mid_yield": 350.0, "mid_price": 1.0},
-        "Strawberry": {"yield": "Low: 50, Mid: 75, High: 100", "price": "Low: 1.0, Mid: 2.0, High: 3.0", "mid_yield": 75.0, "mid_price": 2.0},
-        "Cucumber": {"yield": "Low: 200, Mid: 350, High: 500", "price": "Low: 0.2, Mid: 0.35, High: 0.5", "mid_yield": 350.0, "mid_price": 0.35}
-    }
+    selected_product = st.selectbox("Select Product", PRODUCT_OPTIONS, key="selected_product")
+
+    # Preset ranges for product yields (tons/ha/year) and prices (USD/kg)
+    product_ranges = PRODUCT_RANGES[selected_product]
 
     # Editable constants - only number_input with mid defaults, range indicated in label
     st.header("Editable Constants")
@@ -60,8 +258,8 @@ with tab1:
     cream_price_usd = st.number_input("Cream Price (USD/kg) (Low: 2, Mid: 3, High: 4)", value=3.0, step=0.5, key="cream_price_usd")
 
     # Greenhouse
-    yield_tons_ha = st.number_input(f"{selected_product} Yield (tons/ha/year) ({product_ranges[selected_product]['yield']})", value=product_ranges[selected_product]["mid_yield"], step=10.0, key="yield_tons_ha")
-    product_price_usd = st.number_input(f"{selected_product} Price (USD/kg) ({product_ranges[selected_product]['price']})", value=product_ranges[selected_product]["mid_price"], step=0.05, key="product_price_usd")
+    yield_tons_ha = st.number_input(f"{selected_product} Yield (tons/ha/year) ({format_range(product_ranges['yield'])})", value=product_ranges["yield"][1], step=10.0, key="yield_tons_ha")
+    product_price_usd = st.number_input(f"{selected_product} Price (USD/kg) ({format_range(product_ranges['price'])})", value=product_ranges["price"][1], step=0.05, key="product_price_usd")
 
     # Biogas/Energy
     manure_per_cow_kg = st.number_input("Daily Manure per Cow (kg) (Low: 40, Mid: 60, High: 80)", value=60.0, step=5.0, key="manure_per_cow_kg")
@@ -84,138 +282,37 @@ with tab1:
     gh_elec_per_ha_kwh_year = st.number_input("Greenhouse Electricity Need (kWh/ha/year) (Low: 500000, Mid: 1000000, High: 1500000)", value=1000000.0, step=100000.0, key="gh_elec_per_ha_kwh_year")
 
     if pct_milk + pct_cheese + pct_cream == 100:
-        # Calculations function updated for dairy portions and product
-        def calculate_farm_metrics(cows, deeded_ha, grassland_ha, greenhouse_ha):
-            # Land requirements
-            pasture_ha = min(grassland_ha, cows * (feed_dm_per_cow_kg / 2) / grassland_yield_kg_ha)
-            buildings_ha = 1
-            feed_crop_ha = max(0, deeded_ha - pasture_ha - greenhouse_ha - buildings_ha)
-            
-            # Land check
-            feed_needed_kg = cows * feed_dm_per_cow_kg
-            pasture_feed_kg = pasture_ha * grassland_yield_kg_ha
-            required_feed_crop_ha = max(0, (feed_needed_kg - pasture_feed_kg) / feed_crop_yield_kg_ha)
-            total_required_ha = pasture_ha + greenhouse_ha + buildings_ha + required_feed_crop_ha
-            warning = f"Warning: For full feed self-sufficiency, need {total_required_ha:.1f} ha (using purchased feed instead)." if total_required_ha > deeded_ha else None
-
-            # Feed sufficiency
-            crop_feed_kg = feed_crop_ha * feed_crop_yield_kg_ha
-            total_feed_kg = pasture_feed_kg + crop_feed_kg
-            purchased_feed_kg = max(0, feed_needed_kg - total_feed_kg)
-
-            # Investment costs
-            cost_cows = cows * 3000.0
-            cost_greenhouse = greenhouse_ha * greenhouse_cost_per_ha
-            cost_infrastructure = 80000.0 * (cows / 60)
-            cost_bioenergy = 50000.0 * (cows / 60)
-            cost_equipment = 30000.0 * (cows / 60)
-            cost_supplies = 10000.0 * (cows / 60)
-            total_investment = cost_cows + cost_greenhouse + cost_infrastructure + cost_bioenergy + cost_equipment + cost_supplies
-
-            # Operating costs
-            cost_feed = purchased_feed_kg * purchased_feed_cost_usd
-            cost_labor = 36000.0 * (cows / 60 + greenhouse_ha / 1.5)
-            cost_vet = cows * 50.0
-            cost_utilities = 5000.0 * (cows / 60)
-            cost_marketing = 3000.0 * (cows / 60)
-            cost_greenhouse_ops = 10000.0 * (greenhouse_ha / 1.5)
-            cost_maintenance = 5000.0 * (cows / 60)
-            
-            # Dairy products and revenue
-            milk_liters_day = cows * milk_yield_liters
-            raw_milk_liters_day = milk_liters_day * (pct_milk / 100)
-            cheese_kg_day = (milk_liters_day * (pct_cheese / 100)) * cheese_yield_kg_per_l
-            cream_kg_day = (milk_liters_day * (pct_cream / 100)) * cream_yield_kg_per_l
-            dairy_revenue_day = raw_milk_liters_day * milk_price_usd + cheese_kg_day * cheese_price_usd + cream_kg_day * cream_price_usd
-            dairy_revenue_year = dairy_revenue_day * 365
-
-            # Greenhouse product
-            product_kg_day = greenhouse_ha * yield_tons_ha * 1000 / 365
-            product_revenue_day = product_kg_day * product_price_usd
-            product_revenue_year = product_revenue_day * 365
-
-            # Biogas and electricity
-            manure_kg_day = cows * manure_per_cow_kg
-            vs_kg_day = manure_kg_day * vs_fraction
-            biogas_m3_day = vs_kg_day * biogas_yield_m3_kg
-            electricity_kwh_day = biogas_m3_day * energy_per_m3_kwh * electrical_efficiency
-            farm_electricity_need_kwh_day = (cows * farm_elec_per_cow_kwh_year / 365) + (greenhouse_ha * gh_elec_per_ha_kwh_year / 365)
-            surplus_kwh_day = max(0, electricity_kwh_day - farm_electricity_need_kwh_day)
-            shortfall_kwh_day = max(0, farm_electricity_need_kwh_day - electricity_kwh_day)
-            electricity_revenue_day = surplus_kwh_day * electricity_sell_price_usd
-            electricity_revenue_year = electricity_revenue_day * 365
-            electricity_purchase_cost_year = shortfall_kwh_day * 365 * electricity_purchase_price_usd
-            electricity_purchase_day = shortfall_kwh_day * electricity_purchase_price_usd
-
-            # Total revenue and costs
-            total_revenue_year = dairy_revenue_year + product_revenue_year + electricity_revenue_year
-            total_costs = cost_feed + cost_labor + cost_vet + cost_utilities + cost_marketing + cost_greenhouse_ops + cost_maintenance + electricity_purchase_cost_year
-
-            # Daily costs
-            daily_cost_feed = cost_feed / 365
-            daily_cost_labor = cost_labor / 365
-            daily_cost_vet = cost_vet / 365
-            daily_cost_utilities = cost_utilities / 365
-            daily_cost_marketing = cost_marketing / 365
-            daily_cost_greenhouse = cost_greenhouse_ops / 365
-            daily_cost_maintenance = cost_maintenance / 365
-            daily_cost_electricity_purchase = electricity_purchase_day
-
-            # Profit and payback
-            annual_profit = total_revenue_year - total_costs
-            payback_period = total_investment / annual_profit if annual_profit > 0 else float('inf')
-
-            # Projections
-            years = [1, 2, 3, 4, 5]
-            revenue_projections = [total_revenue_year * (1 + 0.02) ** (year - 1) for year in years]
-            cost_projections = [total_costs * (1 + 0.03) ** (year - 1) for year in years]
-            profit_projections = [rev - cost for rev, cost in zip(revenue_projections, cost_projections)]
-
-            return {
-                "Investment (USD)": total_investment,
-                "Investment (TRY)": total_investment * usd_to_try,
-                "Operating Costs (USD)": total_costs,
-                "Operating Costs (TRY)": total_costs * usd_to_try,
-                "Revenue (USD)": total_revenue_year,
-                "Revenue (TRY)": total_revenue_year * usd_to_try,
-                "Profit (USD)": annual_profit,
-                "Profit (TRY)": annual_profit * usd_to_try,
-                "Payback Period (Years)": payback_period,
-                "Daily Costs": {
-                    "Feed (USD)": daily_cost_feed,
-                    "Labor (USD)": daily_cost_labor,
-                    "Veterinary (USD)": daily_cost_vet,
-                    "Utilities (USD)": daily_cost_utilities,
-                    "Marketing (USD)": daily_cost_marketing,
-                    "Greenhouse Ops (USD)": daily_cost_greenhouse,
-                    "Maintenance (USD)": daily_cost_maintenance,
-                    "Electricity Purchase (USD)": daily_cost_electricity_purchase
-                },
-                "Daily Products": {
-                    "Dairy (liters/day raw milk)": raw_milk_liters_day,
-                    "Cheese (kg/day)": cheese_kg_day,
-                    "Cream (kg/day)": cream_kg_day,
-                    "Dairy (USD/day)": dairy_revenue_day,
-                    f"{selected_product} (kg/day)": product_kg_day,
-                    f"{selected_product} (USD/day)": product_revenue_day,
-                    "Electricity Produced (kWh/day)": electricity_kwh_day,
-                    "Electricity Consumed (kWh/day)": farm_electricity_need_kwh_day,
-                    "Surplus Electricity (kWh/day)": surplus_kwh_day,
-                    "Surplus Electricity (USD/day)": electricity_revenue_day,
-                    "Shortfall Electricity (kWh/day)": shortfall_kwh_day
-                },
-                "Projections": {"Years": years, "Revenue": revenue_projections, "Costs": cost_projections, "Profit": profit_projections},
-                "Dairy Revenue Year": dairy_revenue_year,
-                "Product Revenue Year": product_revenue_year,
-                "Electricity Revenue Year": electricity_revenue_year,
-                "Purchased Feed Kg": purchased_feed_kg,
-                "Electricity Purchase Cost Year": electricity_purchase_cost_year,
-                "Shortfall Kwh Year": shortfall_kwh_day * 365,
-                "Purchased Feed Cost Year": cost_feed
-            }, warning
-
-        # Perform calculations
-        results, warning = calculate_farm_metrics(num_cows, deeded_land, grassland_area, greenhouse_area)
+        constants = {
+            "usd_to_try": usd_to_try,
+            "milk_yield_liters": milk_yield_liters,
+            "milk_price_usd": milk_price_usd,
+            "cheese_price_usd": cheese_price_usd,
+            "cream_price_usd": cream_price_usd,
+            "yield_tons_ha": yield_tons_ha,
+            "product_price_usd": product_price_usd,
+            "manure_per_cow_kg": manure_per_cow_kg,
+            "vs_fraction": vs_fraction,
+            "biogas_yield_m3_kg": biogas_yield_m3_kg,
+            "energy_per_m3_kwh": energy_per_m3_kwh,
+            "electrical_efficiency": electrical_efficiency,
+            "electricity_sell_price_usd": electricity_sell_price_usd,
+            "electricity_purchase_price_usd": electricity_purchase_price_usd,
+            "feed_dm_per_cow_kg": feed_dm_per_cow_kg,
+            "grassland_yield_kg_ha": grassland_yield_kg_ha,
+            "feed_crop_yield_kg_ha": feed_crop_yield_kg_ha,
+            "purchased_feed_cost_usd": purchased_feed_cost_usd,
+            "greenhouse_cost_per_ha": greenhouse_cost_per_ha,
+            "farm_elec_per_cow_kwh_year": farm_elec_per_cow_kwh_year,
+            "gh_elec_per_ha_kwh_year": gh_elec_per_ha_kwh_year
+        }
+
+
+        # Perform calculations (or reuse an earlier rerun's results and tables)
+        farm_inputs = (num_cows, deeded_land, grassland_area, greenhouse_area, pct_milk, pct_cheese, pct_cream, selected_product, constants)
+        profiler.lap("Widgets")
+        farm_view = get_result_cache().get_or_compute(parameter_key("farm", *farm_inputs), lambda: build_farm_view(get_farm_graph(), profiler, *farm_inputs))
+        profiler.lap("Cache Lookup")
+        results, warning = farm_view["results"], farm_view["warning"]
 
         if warning:
             st.warning(warning)
@@ -224,60 +321,17 @@ with tab1:
 
         # Basic Results Table
         st.subheader("Basic Financial Results")
-        table_data = {
-            "Metric": ["Initial Investment", "Annual Operating Costs", "Annual Revenue", "Annual Profit", "Payback Period"],
-            "USD": [
-                f"${results['Investment (USD)']:,.2f}",
-                f"${results['Operating Costs (USD)']:,.2f}",
-                f"${results['Revenue (USD)']:,.2f}",
-                f"${results['Profit (USD)']:,.2f}",
-                f"{results['Payback Period (Years)']:.2f} years"
-            ],
-            "TRY": [
-                f"{results['Investment (TRY)']:,.2f}",
-                f"{results['Operating Costs (TRY)']:,.2f}",
-                f"{results['Revenue (TRY)']:,.2f}",
-                f"{results['Profit (TRY)']:,.2f}",
-                f"{results['Payback Period (Years)']:.2f} years"
-            ]
-        }
-        df_basic = pd.DataFrame(table_data)
-        st.table(df_basic)
-
-        # Revenue Breakdown Pie
-        st.subheader("Revenue Breakdown")
-        fig_rev_pie = px.pie(names=['Dairy', selected_product, 'Electricity Surplus'],
-                             values=[results['Dairy Revenue Year'], results['Product Revenue Year'], max(0, results['Electricity Revenue Year'])],
-                             title="Annual Revenue Sources")
-        st.plotly_chart(fig_rev_pie)
-
-        # Cost Breakdown Pie
-        st.subheader("Cost Breakdown")
-        costs_dict = {
-            'Feed': results['Daily Costs']['Feed (USD)'] * 365,
-            'Labor': results['Daily Costs']['Labor (USD)'] * 365,
-            'Veterinary': results['Daily Costs']['Veterinary (USD)'] * 365,
-            'Utilities': results['Daily Costs']['Utilities (USD)'] * 365,
-            'Marketing': results['Daily Costs']['Marketing (USD)'] * 365,
-            'Greenhouse Ops': results['Daily Costs']['Greenhouse Ops (USD)'] * 365,
-            'Maintenance': results['Daily Costs']['Maintenance (USD)'] * 365,
-            'Electricity Purchase': results['Daily Costs']['Electricity Purchase (USD)'] * 365
-        }
-        fig_cost_pie = px.pie(names=list(costs_dict.keys()), values=list(costs_dict.values()), title="Annual Operating Costs")
-        st.plotly_chart(fig_cost_pie)
-
-        # Projections
-        st.subheader("5-Year Financial Projections")
-        projection_data = pd.DataFrame({
-            "Year": results["Projections"]["Years"],
-            "Revenue (USD)": results["Projections"]["Revenue"],
-            "Costs (USD)": results["Projections"]["Costs"],
-            "Profit (USD)": results["Projections"]["Profit"]
-        })
-        fig = px.line(projection_data, x="Year", y=["Revenue (USD)", "Costs (USD)", "Profit (USD)"],
-                      title="5-Year Financial Projections",
-                      labels={"value": "Amount (USD)", "variable": "Metric"})
-        st.plotly_chart(fig)
+        st.table(farm_view["df_basic"])
+        profiler.lap("Tables (render)")
+
+        # Revenue and cost breakdowns, projections
+        chart_section("Revenue Breakdown", "show_revenue_chart", parameter_key("revenue_chart", *farm_inputs),
+                      lambda: build_revenue_pie(results, selected_product))
+        chart_section("Cost Breakdown", "show_cost_chart", parameter_key("cost_chart", *farm_inputs),
+                      lambda: build_cost_pie(results))
+        chart_section("5-Year Financial Projections", "show_projection_chart", parameter_key("projection_chart", *farm_inputs),
+                      lambda: build_projection_chart(results))
+        profiler.skip()
 
         # Summary and Insights
         st.header("Summary and Insights")
@@ -286,8 +340,8 @@ with tab1:
         """)
 
         st.subheader("Financial Summary")
-        df_financial_summary = pd.DataFrame(table_data)
-        st.table(df_financial_summary)
+        st.table(farm_view["df_basic"])
+        profiler.lap("Tables (render)")
 
         feed_status = "Self-sufficient in feed." if results['Purchased Feed Kg'] == 0 else f"Requires purchasing {results['Purchased Feed Kg']:,.0f} kg of feed annually at {results['Purchased Feed Cost Year']:,.2f} USD/year."
         energy_status = "Energy self-sufficient with surplus electricity for revenue." if results['Daily Products']['Shortfall Electricity (kWh/day)'] == 0 else f"Requires purchasing {results['Shortfall Kwh Year']:,.0f} kWh of electricity annually at {results['Electricity Purchase Cost Year']:,.2f} USD/year."
@@ -306,8 +360,273 @@ with tab1:
         - **Seasonal Feed Shortages (Winter Yield Drop of 10-15%):** Store surplus silage from summer and diversify feed sources.
         - **Energy Variability:** Monitor biogas production; consider backup renewable sources like solar if shortfalls are frequent.
         """.format(selected_product=selected_product))
+        profiler.lap("Summary Text")
+
+        # Analyses below rerun on their own when their settings or buttons change
+        seasonal_section(farm_inputs, results)
+        cash_flow_section(farm_inputs)
+        monte_carlo_section(farm_inputs)
+        sensitivity_section(farm_inputs)
+        sobol_section(farm_inputs)
+        optimizer_section(farm_inputs)
+        profiler.skip()
+    record_phases("Full Farm", profiler)
+
+
+@st.fragment
+def seasonal_section(farm_inputs, results):
+    import pandas as pd
+
+    profiler = PhaseTimer()
+    num_cows, deeded_land, grassland_area, greenhouse_area, pct_milk, pct_cheese, pct_cream, selected_product, constants = farm_inputs
+    st.header("Seasonal Simulation")
+    st.write("Steps the farm day by day with seasonal milk, manure, greenhouse electricity, crop and pasture profiles, "
+             "netting electricity per day instead of over an average day.")
+    season_col1, season_col2 = st.columns(2)
+    with season_col1:
+        season_years = st.slider("Years to Simulate", 1, 10, 5, key="season_years")
+    with season_col2:
+        season_storage = st.number_input("On-site Storage Capacity (kWh)", min_value=0.0, value=0.0, step=500.0, key="season_storage")
+    seasonal_key = parameter_key("seasonal", *farm_inputs, season_years, season_storage)
+    seasonal = get_result_cache().get_or_compute(seasonal_key, lambda: simulate_seasonal(
+        num_cows, deeded_land, grassland_area, greenhouse_area, pct_milk, pct_cheese, pct_cream,
+        years=season_years, storage_kwh=season_storage, return_daily=True, **constants))
+    profiler.lap("Simulation")
+    df_seasonal = pd.DataFrame({
+        "Year": seasonal["Years"],
+        "Revenue (USD)": seasonal["Revenue (USD)"],
+        "Operating Costs (USD)": seasonal["Operating Costs (USD)"],
+        "Profit (USD)": seasonal["Profit (USD)"],
+        "Surplus Electricity (kWh)": seasonal["Surplus Electricity (kWh)"],
+        "Shortfall Electricity (kWh)": seasonal["Shortfall Electricity (kWh)"],
+        "Purchased Feed (kg)": seasonal["Purchased Feed Kg"]
+    })
+    st.dataframe(df_seasonal.style.format("{:,.0f}", subset=df_seasonal.columns[1:]), hide_index=True)
+    st.write(f"Year 1 profit: ${seasonal['Profit (USD)'][0]:,.2f} seasonal vs. ${results['Profit (USD)']:,.2f} from the average day.")
+    profiler.lap("Tables (render)")
+    chart_section("Year 1 Daily Electricity Balance", "show_daily_electricity_chart", parameter_key("daily_electricity_chart", seasonal_key),
+                  lambda: build_daily_electricity_chart(seasonal))
+    profiler.skip()
+    record_phases("Seasonal", profiler)
+
+
+@st.fragment
+def cash_flow_section(farm_inputs):
+    import pandas as pd
+
+    profiler = PhaseTimer()
+    num_cows, deeded_land, grassland_area, greenhouse_area, pct_milk, pct_cheese, pct_cream, selected_product, constants = farm_inputs
+    st.header("Long-Horizon Cash Flow")
+    st.write("Projects yearly cash flows with growth per revenue and cost line, greenhouse and equipment replacement "
+             "and a TRY exchange-rate path, instead of the fixed 5-year projection above.")
+    cf_col1, cf_col2, cf_col3 = st.columns(3)
+    with cf_col1:
+        cf_years = st.slider("Horizon (years)", 5, 40, DEFAULT_YEARS, key="cf_years")
+        cf_discount = st.number_input("Discount Rate (%)", min_value=0.0, max_value=50.0, value=DEFAULT_DISCOUNT_RATE * 100, step=0.5, key="cf_discount")
+        cf_fx_growth = st.number_input("USD to TRY Change (%/year)", value=0.0, step=1.0, key="cf_fx_growth")
+    with cf_col2:
+        cf_revenue_growth = st.number_input("Revenue Growth (%/year)", value=REVENUE_GROWTH * 100, step=0.5, key="cf_revenue_growth")
+        cf_cost_growth = st.number_input("Cost Growth (%/year)", value=COST_GROWTH * 100, step=0.5, key="cf_cost_growth")
+    with cf_col3:
+        cf_lives = {name: st.number_input(f"{name.title()} Life (years, 0 = never replaced)", min_value=0, max_value=50, value=life, step=1, key=f"cf_life_{name}")
+                    for name, (_, life) in REPLACEMENTS.items()}
+    with st.expander("Growth per Line (%/year, blank = revenue/cost growth above)"):
+        line_growth = {line: st.number_input(line.replace("_", " ").title(), value=None, step=0.5, key=f"cf_growth_{line}")
+                       for line in DEFAULT_GROWTH_RATES}
+    growth_rates = {line: (rate if rate is not None else cf_revenue_growth if line in REVENUE_LINES else cf_cost_growth) / 100
+                    for line, rate in line_growth.items()}
+    options = {"years": cf_years, "discount_rate": cf_discount / 100, "growth_rates": growth_rates,
+               "replacement_lives": cf_lives, "capex_growth": cf_cost_growth / 100, "fx_growth": cf_fx_growth / 100}
+    # The Monte Carlo section can add NPV/IRR bands with these settings
+    st.session_state["cash_flow_options"] = options
+    profiler.lap("Widgets")
+
+    cash_flow_key = parameter_key("cash_flow", *farm_inputs, options)
+    cash_flow = get_result_cache().get_or_compute(cash_flow_key, lambda: analyze_cash_flows(
+        num_cows, deeded_land, grassland_area, greenhouse_area, pct_milk, pct_cheese, pct_cream, **options, **constants))
+    profiler.lap("Cash Flow")
+
+    def years_text(value):
+        return f"{value:.1f} years" if np.isfinite(value) else "Not within horizon"
+
+    metric_cols = st.columns(4)
+    metric_cols[0].metric("NPV (USD)", f"${float(cash_flow['NPV (USD)']):,.0f}")
+    metric_cols[1].metric("IRR", f"{float(cash_flow['IRR']):.1%}" if np.isfinite(cash_flow["IRR"]) else "None")
+    metric_cols[2].metric("Payback", years_text(cash_flow["Payback Period (Years)"]))
+    metric_cols[3].metric("Discounted Payback", years_text(cash_flow["Discounted Payback Period (Years)"]))
+    df_cash_flow = pd.DataFrame({
+        "Year": cash_flow["Years"],
+        "Revenue (USD)": cash_flow["Revenue (USD)"],
+        "Operating Costs (USD)": cash_flow["Operating Costs (USD)"],
+        "Capital Expenditure (USD)": cash_flow["Capital Expenditure (USD)"],
+        "Net Cash Flow (USD)": cash_flow["Net Cash Flow (USD)"],
+        "Cumulative (USD)": cash_flow["Cumulative Cash Flow (USD)"],
+        "USD to TRY": cash_flow["USD to TRY"],
+        "Net Cash Flow (TRY)": cash_flow["Net Cash Flow (TRY)"]
+    })
+    st.dataframe(df_cash_flow.style.format("{:,.0f}", subset=df_cash_flow.columns[1:]).format("{:,.2f}", subset=["USD to TRY"]), hide_index=True)
+    profiler.lap("Tables (render)")
+    chart_section("Cumulative Cash Flow", "show_cash_flow_chart", parameter_key("cash_flow_chart", cash_flow_key),
+                  lambda: build_cash_flow_chart(cash_flow))
+    profiler.skip()
+    record_phases("Cash Flow", profiler)
+
+
+@st.fragment
+def monte_carlo_section(farm_inputs):
+    profiler = PhaseTimer()
+    num_cows, deeded_land, grassland_area, greenhouse_area, pct_milk, pct_cheese, pct_cream, selected_product, constants = farm_inputs
+    st.header("Uncertainty Analysis (Monte Carlo)")
+    st.write("Samples every editable constant from its Low/Mid/High range while keeping the farm design above fixed.")
+    mc_col1, mc_col2, mc_col3 = st.columns(3)
+    with mc_col1:
+        mc_samples = st.number_input("Samples", min_value=1000, max_value=5_000_000, value=1_000_000, step=100_000, key="mc_samples")
+    with mc_col2:
+        mc_seed = st.number_input("Random Seed", min_value=0, value=42, step=1, key="mc_seed")
+    with mc_col3:
+        mc_distribution = st.selectbox("Distribution", DISTRIBUTIONS, key="mc_distribution")
+    mc_fixed = st.multiselect("Hold at current value (not sampled)", list(constants), key="mc_fixed")
+    mc_cash_flow = st.checkbox("Include NPV, IRR and discounted payback (cash-flow settings above; slower)", key="mc_cash_flow")
+    if st.button("Run Monte Carlo", key="mc_run"):
+        import pandas as pd
+        import plotly.express as px
+
+        with st.spinner("Sampling scenarios..."):
+            mc = run_monte_carlo(num_cows, deeded_land, grassland_area, greenhouse_area, pct_milk, pct_cheese, pct_cream,
+                                 product=selected_product, n_samples=int(mc_samples), seed=int(mc_seed),
+                                 distribution=mc_distribution, fixed={name: constants[name] for name in mc_fixed},
+                                 cash_flow=st.session_state.get("cash_flow_options") if mc_cash_flow else None)
+        st.metric("P(Profit < 0)", f"{mc['P(Profit < 0)']:.1%}")
+        st.metric("P(No Payback)", f"{mc['P(No Payback)']:.1%}")
+        if "P(NPV < 0)" in mc:
+            st.metric("P(NPV < 0)", f"{mc['P(NPV < 0)']:.1%}")
+            st.metric("P(No IRR)", f"{mc['P(No IRR)']:.1%}")
+        band_names = [f"P{p:g}" for p in mc["Percentiles"]] + ["Mean"]
+        metric_labels = {"Profit (USD)": "Annual Profit (USD)", "Payback Period (Years)": "Payback Period (Years)",
+                         "Shortfall Kwh Year": "Electricity Shortfall (kWh/year)", "NPV (USD)": "NPV (USD)", "IRR": "IRR",
+                         "Discounted Payback Period (Years)": "Discounted Payback (Years)"}
+        metrics = [metric for metric in MONTE_CARLO_METRICS + CASH_FLOW_METRICS if metric in mc]
+
+        def band_text(metric, band):
+            if band not in mc[metric]:
+                return "n/a"
+            value = mc[metric][band]
+            if metric == "IRR":
+                return f"{value:.1%}" if np.isfinite(value) else "No IRR" if value < 0 else "Above grid"
+            return f"{value:,.2f}" if np.isfinite(value) else "Never"
+
+        df_mc = pd.DataFrame({
+            "Metric": [metric_labels[metric] for metric in metrics],
+            **{band: [band_text(metric, band) for metric in metrics] for band in band_names}
+        })
+        st.table(df_mc)
+        edges = mc["Profit Histogram"]["Edges"]
+        fig_mc = px.bar(x=[(lo + hi) / 2 for lo, hi in zip(edges[:-1], edges[1:])], y=mc["Profit Histogram"]["Counts"],
+                        title=f"Annual Profit Distribution ({mc['Samples']:,} samples)",
+                        labels={"x": "Annual Profit (USD)", "y": "Samples"})
+        st.plotly_chart(fig_mc)
+    profiler.lap("Monte Carlo")
+    record_phases("Monte Carlo", profiler)
+
+
+@st.fragment
+def sensitivity_section(farm_inputs):
+    profiler = PhaseTimer()
+    st.header("Sensitivity Analysis")
+    st.write("Moves each editable constant to its Low and High value while the others stay at their current values.")
+    sensitivity_view = get_result_cache().get_or_compute(parameter_key("sensitivity", *farm_inputs),
+                                                         lambda: build_sensitivity_view(*farm_inputs))
+    profiler.lap("Tornado")
+    st.table(sensitivity_view["df_sensitivity"])
+    profiler.lap("Tables (render)")
+    chart_section("Annual Profit Sensitivity", "show_tornado_chart", parameter_key("tornado_chart", *farm_inputs),
+                  lambda: build_tornado_chart(sensitivity_view["sensitivity_rows"]))
+    profiler.skip()
+    record_phases("Sensitivity", profiler)
+
+
+@st.fragment
+def sobol_section(farm_inputs):
+    num_cows, deeded_land, grassland_area, greenhouse_area, pct_milk, pct_cheese, pct_cream, selected_product, constants = farm_inputs
+    st.subheader("Variance Decomposition (Sobol)")
+    sobol_col1, sobol_col2 = st.columns(2)
+    with sobol_col1:
+        sobol_metric = st.selectbox("Metric", SENSITIVITY_METRICS, key="sobol_metric")
+    with sobol_col2:
+        sobol_n_base = st.number_input("Base Samples", min_value=256, max_value=65536, value=4096, step=256, key="sobol_n_base")
+    if st.button("Run Sobol Analysis", key="sobol_run"):
+        st.session_state["sobol_job"] = get_background_pool().submit(
+            sobol_indices, num_cows, deeded_land, grassland_area, greenhouse_area, pct_milk, pct_cheese, pct_cream,
+            product=selected_product, metric=sobol_metric, n_base=int(sobol_n_base), seed=0,
+            executor=get_process_pool())
+    sobol_job = st.session_state.get("sobol_job")
+    sobol_pending = sobol_job is not None and not sobol_job.done()
+
+    # Poll the background job without blocking the rest of the page
+    @st.fragment(run_every="1s" if sobol_pending else None)
+    def show_sobol_results():
+        job = st.session_state.get("sobol_job")
+        if job is None:
+            return
+        if not job.done():
+            st.info("Sobol analysis running in the background...")
+            return
+        if sobol_pending:
+            # Full rerun to stop polling now that the job has finished
+            st.rerun()
+        import pandas as pd
+
+        sobol = job.result()
+        st.write(f"{sobol['Metric']}: {sobol['Evaluations']:,} model evaluations")
+        df_sobol = pd.DataFrame({"Constant": sobol["Constant"], "First Order (S1)": sobol["S1"], "Total Effect (ST)": sobol["ST"]})
+        st.table(df_sobol.style.format({"First Order (S1)": "{:.3f}", "Total Effect (ST)": "{:.3f}"}))
+
+    show_sobol_results()
+
+
+@st.fragment
+def optimizer_section(farm_inputs):
+    profiler = PhaseTimer()
+    num_cows, deeded_land, grassland_area, greenhouse_area, pct_milk, pct_cheese, pct_cream, selected_product, constants = farm_inputs
+    st.header("Design Optimizer")
+    st.write(f"Searches cows, greenhouse area and grassland area for the {deeded_land} ha of deeded land using the constants above.")
+    opt_col1, opt_col2, opt_col3 = st.columns(3)
+    with opt_col1:
+        opt_objective = st.selectbox("Objective", OBJECTIVES, format_func={"profit": "Maximize Profit", "payback": "Minimize Payback"}.get, key="opt_objective")
+    with opt_col2:
+        opt_feed = st.checkbox("Require feed self-sufficiency", key="opt_feed")
+    with opt_col3:
+        opt_energy = st.checkbox("Require zero electricity shortfall", key="opt_energy")
+    if st.button("Optimize Design", key="opt_run"):
+        optimized = optimize_design(deeded_land, pct_milk, pct_cheese, pct_cream, objective=opt_objective, constants=constants,
+                                    require_feed_self_sufficiency=opt_feed, require_no_shortfall=opt_energy)
+        st.write(f"Evaluated {optimized['Evaluations']:,} designs: {optimized['Unique Designs']:,} unique, "
+                 f"{optimized['Feasible Designs']:,} of them feasible.")
+        if optimized["Best"] is None:
+            st.error("No feasible design meets the selected constraints.")
+        else:
+            best = optimized["Best"]
+            st.success(f"Best design: {best['Cows']:.0f} cows, {best['Greenhouse Area (ha)']:.2f} ha greenhouse, "
+                       f"{best['Grassland Area (ha)']:.0f} ha grassland. Annual profit ${best['Profit (USD)']:,.2f}, "
+                       f"investment ${best['Investment (USD)']:,.2f}, payback {best['Payback Period (Years)']:.2f} years.")
+        if optimized["Pareto Front"]:
+            import pandas as pd
+            import plotly.express as px
+
+            df_front = pd.DataFrame(optimized["Pareto Front"])
+            fig_front = px.scatter(df_front, x="Investment (USD)", y="Profit (USD)", color="Payback Period (Years)",
+                                   hover_data=["Cows", "Greenhouse Area (ha)", "Grassland Area (ha)"],
+                                   title="Pareto Front: Profit vs. Investment")
+            st.plotly_chart(fig_front)
+            st.dataframe(df_front)
+    profiler.lap("Optimizer")
+    record_phases("Optimizer", profiler)
+
+
+@st.fragment
+def isolated_tab():
+    profiler = PhaseTimer()
 
-with tab2:
     st.header("Isolated Calculations")
 
     # Isolated Energy Production from Cows
@@ -341,4 +660,149 @@ with tab2:
 
     st.write(f"Daily Consumption: {elec_day_gh:.2f} kWh")
     st.write(f"Monthly: {elec_month_gh:.2f} kWh")
-    st.write(f"Yearly: {elec_year_gh:.2f} kWh")
\ No newline at end of file
+    st.write(f"Yearly: {elec_year_gh:.2f} kWh")
+    profiler.lap("Widgets and Results")
+    record_phases("Isolated", profiler)
+
+
+@st.fragment
+def portfolio_tab():
+    import pandas as pd
+
+    profiler = PhaseTimer()
+    st.header("Cooperative Portfolio")
+    st.write("Member farms share a central digester and net electricity (daily) and feed-crop silage (yearly) with each other "
+             "before buying from or selling to the market. Constants not given per farm use their Mid values.")
+    default_farms = pd.DataFrame({
+        "cows": [100, 300, 60],
+        "deeded_ha": [51, 200, 30],
+        "grassland_ha": [35, 40, 20],
+        "greenhouse_ha": [1.5, 0.0, 2.0],
+        "product": ["Tomato", "Tomato", "Lettuce"]
+    })
+    uploaded = st.file_uploader("Member Farms CSV (one farm per row, columns named like the batch inputs)", type="csv", key="portfolio_csv")
+    if uploaded is not None:
+        df_farms = pd.read_csv(uploaded)
+        st.write(f"{len(df_farms):,} farms loaded from {uploaded.name}.")
+    else:
+        df_farms = st.data_editor(default_farms, num_rows="dynamic", hide_index=True, key="portfolio_farms", column_config={
+            "cows": st.column_config.NumberColumn("Cows", min_value=0, step=10),
+            "deeded_ha": st.column_config.NumberColumn("Deeded Land (ha)", min_value=0),
+            "grassland_ha": st.column_config.NumberColumn("Grassland (ha)", min_value=0),
+            "greenhouse_ha": st.column_config.NumberColumn("Greenhouse (ha)", min_value=0.0),
+            "product": st.column_config.SelectboxColumn("Product", options=PRODUCT_OPTIONS, default="Tomato")
+        })
+    farms = [{name: value for name, value in row.items() if pd.notna(value)} for row in df_farms.to_dict("records")]
+
+    pf_col1, pf_col2, pf_col3 = st.columns(3)
+    with pf_col1:
+        pf_years = st.slider("Years", 1, 10, 5, key="pf_years")
+        pf_shared = st.checkbox("Shared central digester", value=True, key="pf_shared")
+    with pf_col2:
+        pf_efficiency = st.number_input("Central Plant Efficiency (blank = each farm's)", min_value=0.0, max_value=1.0, value=None, step=0.01, key="pf_efficiency")
+        pf_scale = st.number_input("Digester Cost Scale Exponent (1 = no economy of scale)", min_value=0.1, max_value=1.5,
+                                   value=DEFAULT_DIGESTER_SCALE_EXPONENT, step=0.05, key="pf_scale")
+        pf_transport = st.number_input("Manure Transport (USD/tonne)", min_value=0.0, value=0.0, step=0.5, key="pf_transport")
+    with pf_col3:
+        pf_net_electricity = st.checkbox("Net electricity across farms", value=True, key="pf_net_electricity")
+        pf_net_feed = st.checkbox("Net feed across farms", value=True, key="pf_net_feed")
+    options = {"years": pf_years, "shared_digester": pf_shared, "central_efficiency": pf_efficiency, "digester_scale_exponent": pf_scale,
+               "manure_transport_usd_per_t": pf_transport, "net_electricity": pf_net_electricity, "net_feed": pf_net_feed}
+    profiler.lap("Widgets")
+
+    if not farms:
+        st.info("Add at least one farm.")
+        record_phases("Portfolio", profiler)
+        return
+    portfolio_key = parameter_key("portfolio", farms, options)
+    try:
+        portfolio = get_result_cache().get_or_compute(portfolio_key, lambda: simulate_portfolio(farms, return_daily=True, **options))
+    except (KeyError, TypeError, ValueError) as error:
+        st.error(f"Invalid farm definitions: {error}")
+        record_phases("Portfolio", profiler)
+        return
+    profiler.lap("Simulation")
+
+    totals = portfolio["Portfolio"]
+    metric_cols = st.columns(4)
+    metric_cols[0].metric("Year 1 Profit (USD)", f"${totals['Profit (USD)'][0]:,.0f}", f"{totals['Pooling Gain (USD)'][0]:+,.0f} vs. standalone")
+    metric_cols[1].metric("Investment (USD)", f"${totals['Investment (USD)']:,.0f}")
+    metric_cols[2].metric("Electricity Netted (kWh/year)", f"{totals['Electricity Supplied to Members (kWh/year)']:,.0f}")
+    metric_cols[3].metric("Silage Netted (kg/year)", f"{totals['Silage Supplied to Members (kg/year)']:,.0f}")
+    df_years = pd.DataFrame({
+        "Year": portfolio["Years"],
+        "Revenue (USD)": totals["Revenue (USD)"],
+        "Operating Costs (USD)": totals["Operating Costs (USD)"],
+        "Profit (USD)": totals["Profit (USD)"],
+        "Standalone Profit (USD)": totals["Standalone Profit (USD)"],
+        "Pooling Gain (USD)": totals["Pooling Gain (USD)"]
+    })
+    st.dataframe(df_years.style.format("{:,.0f}", subset=df_years.columns[1:]), hide_index=True)
+
+    farm_results = portfolio["Farms"]
+    df_members = pd.DataFrame({
+        "Farm": np.arange(1, len(farms) + 1),
+        "Product": farm_results["Product"],
+        "Investment (USD)": farm_results["Investment (USD)"],
+        "Year 1 Profit (USD)": farm_results["Profit (USD)"][:, 0],
+        "Standalone Profit (USD)": farm_results["Standalone Profit (USD)"][:, 0],
+        "Pooling Gain (USD)": farm_results["Pooling Gain (USD)"][:, 0],
+        "Payback (Years)": farm_results["Payback Period (Years)"],
+        "Electricity Exported (kWh/year)": farm_results["Electricity Exported (kWh/year)"],
+        "Electricity Imported (kWh/year)": farm_results["Electricity Imported (kWh/year)"],
+        "Purchased Feed (kg/year)": farm_results["Purchased Feed (kg/year)"]
+    })
+    st.subheader("Member Farms")
+    st.dataframe(df_members.style.format("{:,.0f}", subset=df_members.columns[2:]).format("{:,.2f}", subset=["Payback (Years)"]), hide_index=True)
+    profiler.lap("Tables (render)")
+    chart_section("Portfolio Daily Electricity Balance", "show_portfolio_chart", parameter_key("portfolio_chart", portfolio_key),
+                  lambda: build_portfolio_chart(portfolio))
+    profiler.skip()
+    record_phases("Portfolio", profiler)
+
+
+# Per-run phase timings for the profiling panel; a fragment rerun replaces only its own section's entries
+st.session_state["phase_timings"] = {}
+profiler = PhaseTimer()
+
+# Streamlit app title
+st.title("Integrated Farm Calculator")
+
+# Use tabs for organization; each tab reruns on its own when one of its inputs changes
+tab1, tab2, tab3 = st.tabs(["Full Farm Calculator", "Isolated Calculations", "Cooperative Portfolio"])
+profiler.lap("Layout")
+
+with tab1:
+    full_farm_tab()
+
+with tab2:
+    isolated_tab()
+
+with tab3:
+    portfolio_tab()
+profiler.skip()
+
+# Debug panel: shared results cache counters (includes this rerun's lookups)
+with st.sidebar.expander("Debug: Results Cache"):
+    cache_stats = get_result_cache().stats()
+    st.table({"Counter": list(cache_stats), "Value": [f"{value:,.2f}" if isinstance(value, float) else f"{value:,}" for value in cache_stats.values()]})
+    if st.button("Clear Results Cache", key="clear_result_cache"):
+        get_result_cache().clear()
+
+with st.sidebar.expander("Debug: Model Graph"):
+    farm_graph = get_farm_graph()
+    st.write("Nodes run by the last model evaluation: " + (", ".join(farm_graph.trace) or "none (inputs unchanged)"))
+    st.table({"Node": list(farm_graph.run_counts), "Runs": list(farm_graph.run_counts.values())})
+profiler.lap("Debug Panels")
+record_phases("App", profiler)
+
+# Opt-in profiling panel with the latest timings of every section
+if st.sidebar.checkbox("Show profiling panel", key="show_profiling"):
+    import pandas as pd
+
+    with st.sidebar.expander("Profiling: This Rerun", expanded=True):
+        phase_timings = st.session_state["phase_timings"]
+        st.write(f"Total: {sum(phase_timings.values()) * 1000:,.1f} ms")
+        df_profile = pd.DataFrame(phase_rows(phase_timings), columns=["Phase", "Time (ms)", "Share"])
+        st.table(df_profile.style.format({"Time (ms)": "{:,.1f}", "Share": "{:.1%}"}))
+        st.caption("Sections rerun on their own; the panel refreshes on the next full rerun.")
@@ -0,0 +1,179 @@
+import math
+
+import numpy as np
+
+from farm_model import COST_GROWTH, REVENUE_GROWTH, model_values
+
+DEFAULT_YEARS = 30
+DEFAULT_DISCOUNT_RATE = 0.08
+
+# Annual cash-flow lines and the model value each one starts from; every line grows at its own rate
+REVENUE_LINES = {
+    "dairy": "dairy_revenue_year",
+    "product": "product_revenue_year",
+    "electricity": "electricity_revenue_year"
+}
+COST_LINES = {
+    "feed": "cost_feed",
+    "labor": "cost_labor",
+    "veterinary": "cost_vet",
+    "utilities": "cost_utilities",
+    "marketing": "cost_marketing",
+    "greenhouse_ops": "cost_greenhouse_ops",
+    "maintenance": "cost_maintenance",
+    "electricity_purchase": "electricity_purchase_cost_year"
+}
+# Defaults reproduce the growth of the 5-year projections
+DEFAULT_GROWTH_RATES = {**dict.fromkeys(REVENUE_LINES, REVENUE_GROWTH), **dict.fromkeys(COST_LINES, COST_GROWTH)}
+
+# Assets bought again at the end of their service life, as (model value of the initial cost, life in years)
+REPLACEMENTS = {
+    "greenhouse": ("cost_greenhouse", 15),
+    "bioenergy": ("cost_bioenergy", 12),
+    "equipment": ("cost_equipment", 10)
+}
+
+# Rates scanned for a sign change of the NPV before bisecting; the low end keeps (1 + rate) ** -years finite
+IRR_GRID = np.concatenate([np.linspace(-0.9, 1.0, 191), [1.5, 2.0, 3.0, 5.0, 10.0]])
+IRR_TOLERANCE = 1e-9
+
+
+def _year_rows(flows):
+    return np.ascontiguousarray(np.moveaxis(np.asarray(flows, dtype=float), -1, 0))
+
+
+def _horner_npv(rows, rate):
+    # Horner's rule over contiguous (years, scenarios...) rows, with no (scenarios, years) temporaries
+    factor = 1 / (1 + rate)
+    value = rows[-1]
+    for row in rows[-2::-1]:
+        value = value * factor + row
+    return value
+
+
+def net_present_value(flows, rate):
+    """NPV of year-0-first cash flows (last axis) at ``rate``, which broadcasts against the leading axes."""
+    return _horner_npv(_year_rows(flows), np.asarray(rate, dtype=float))
+
+
+def internal_rate_of_return(flows, grid=IRR_GRID, tol=IRR_TOLERANCE):
+    """IRR of every row of ``flows``, vectorized over the leading axes.
+
+    The NPV is evaluated at every rate in ``grid`` at once; each scenario then bisects the grid interval where its
+    NPV changes sign, all scenarios together. Flows that turn negative again (costs outgrowing revenue, replacement
+    capex) can have several IRRs; the highest is returned, i.e. the largest discount rate at which the farm still
+    breaks even. Scenarios whose NPV keeps one sign over the grid have no IRR there and get NaN.
+    """
+    flows = np.asarray(flows, dtype=float)
+    grid = np.asarray(grid, dtype=float)
+    years = np.arange(flows.shape[-1])
+    npv = flows @ ((1 + grid[:, np.newaxis]) ** -years).T
+    crossing = np.signbit(npv[..., :-1]) != np.signbit(npv[..., 1:])
+    interval = crossing.shape[-1] - 1 - np.argmax(crossing[..., ::-1], axis=-1)
+    found = crossing.any(axis=-1)
+
+    lo, hi = grid[interval], grid[interval + 1]
+    negative_lo = np.signbit(np.take_along_axis(npv, interval[..., np.newaxis], axis=-1)[..., 0])
+    rows = _year_rows(flows)
+    width = np.max(hi - lo, where=found, initial=tol)
+    for _ in range(math.ceil(math.log2(width / tol))):
+        mid = (lo + hi) / 2
+        same = np.signbit(_horner_npv(rows, mid)) == negative_lo
+        lo = np.where(same, mid, lo)
+        hi = np.where(same, hi, mid)
+    return np.where(found, (lo + hi) / 2, np.nan)
+
+
+def payback_period(flows):
+    """Years until the cumulative cash flow first turns non-negative, interpolated within the year; inf if never."""
+    flows = np.asarray(flows, dtype=float)
+    cumulative = np.cumsum(flows, axis=-1)
+    recovered = cumulative >= 0
+    first = np.argmax(recovered, axis=-1)[..., np.newaxis]
+    before = np.take_along_axis(cumulative, np.maximum(first - 1, 0), axis=-1)[..., 0]
+    flow = np.take_along_axis(flows, first, axis=-1)[..., 0]
+    first = first[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        years = np.where(first > 0, first - 1 - before / flow, 0.0)
+    return np.where(recovered.any(axis=-1), years, np.inf)
+
+
+def project_cash_flows(values, years=DEFAULT_YEARS, discount_rate=DEFAULT_DISCOUNT_RATE, growth_rates=None,
+                       replacement_lives=None, capex_growth=COST_GROWTH, fx_growth=0.0, fx_path=None):
+    """Year-by-year cash flows over ``years`` from the flat model values returned by ``farm_model.model_values``.
+
+    Year 0 carries the initial investment. Each revenue and cost line grows at its own rate from ``growth_rates``
+    (defaults in ``DEFAULT_GROWTH_RATES``); assets in ``REPLACEMENTS`` are bought again every ``replacement_lives``
+    years (0 disables one) at their initial cost escalated by ``capex_growth``, except in the final year. TRY flows use ``fx_path`` (USD to TRY
+    per year, year 0 first) or, if it is not given, ``usd_to_try`` growing by ``fx_growth`` a year.
+    Rates may be scalars or arrays broadcasting against the scenarios; per-year arrays have a trailing year axis.
+    """
+    if years < 1:
+        raise ValueError("years must be at least 1")
+    growth_rates = {**DEFAULT_GROWTH_RATES, **(growth_rates or {})}
+    lives = {name: life for name, (_, life) in REPLACEMENTS.items()}
+    lives.update(replacement_lives or {})
+    unknown = (set(growth_rates) - set(DEFAULT_GROWTH_RATES)) | (set(lives) - set(REPLACEMENTS))
+    if unknown:
+        raise TypeError(f"Unknown cash-flow lines: {', '.join(sorted(unknown))}")
+
+    year = np.arange(years + 1)
+    operating = year > 0
+
+    def grow(lines):
+        # Lines sharing a scalar rate are summed before the year axis is added
+        bases = {}
+        for line, name in lines.items():
+            rate = growth_rates[line]
+            key = float(rate) if np.ndim(rate) == 0 else line
+            previous = bases.get(key, (rate, 0.0))[1]
+            bases[key] = (rate, previous + np.asarray(values[name], dtype=float))
+        return sum(base[..., np.newaxis] * ((1 + np.asarray(rate, dtype=float)[..., np.newaxis]) ** np.maximum(year - 1, 0) * operating)
+                   for rate, base in bases.values())
+
+    revenue = grow(REVENUE_LINES)
+    costs = grow(COST_LINES)
+    escalation = (1 + np.asarray(capex_growth, dtype=float)[..., np.newaxis]) ** year
+    capex = np.asarray(values["total_investment"], dtype=float)[..., np.newaxis] * (year == 0)
+    for name, (cost, _) in REPLACEMENTS.items():
+        if lives[name]:
+            # Nothing bought in the final year would be used inside the horizon, and there is no salvage value
+            replaced = operating & (year < years) & (year % lives[name] == 0)
+            capex = capex + np.asarray(values[cost], dtype=float)[..., np.newaxis] * escalation * replaced
+    net = revenue - costs - capex
+
+    discount = (1 + np.asarray(discount_rate, dtype=float)[..., np.newaxis]) ** -year
+    discounted = net * discount
+    if fx_path is None:
+        fx = np.asarray(values["usd_to_try"], dtype=float)[..., np.newaxis] * (1 + np.asarray(fx_growth, dtype=float)[..., np.newaxis]) ** year
+    else:
+        fx = np.asarray(fx_path, dtype=float)
+        if fx.shape[-1] != years + 1:
+            raise ValueError(f"fx_path needs {years + 1} yearly rates (year 0 first), got {fx.shape[-1]}")
+    net_try = net * fx
+
+    return {
+        "Years": year.tolist(),
+        "Revenue (USD)": revenue,
+        "Operating Costs (USD)": costs,
+        "Capital Expenditure (USD)": capex,
+        "Net Cash Flow (USD)": net,
+        "Cumulative Cash Flow (USD)": np.cumsum(net, axis=-1),
+        "Discounted Cash Flow (USD)": discounted,
+        "USD to TRY": np.broadcast_to(fx, net.shape),
+        "Net Cash Flow (TRY)": net_try,
+        "Cumulative Cash Flow (TRY)": np.cumsum(net_try, axis=-1),
+        "NPV (USD)": discounted.sum(axis=-1),
+        "IRR": internal_rate_of_return(net),
+        "Payback Period (Years)": payback_period(net),
+        "Discounted Payback Period (Years)": payback_period(discounted)
+    }
+
+
+def analyze_cash_flows(cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk=100, pct_cheese=0, pct_cream=0, years=DEFAULT_YEARS,
+                       discount_rate=DEFAULT_DISCOUNT_RATE, growth_rates=None, replacement_lives=None, capex_growth=COST_GROWTH,
+                       fx_growth=0.0, fx_path=None, **constants):
+    """Run the farm model and project its cash flows; parameters broadcast like ``calculate_farm_metrics_batch``."""
+    values = model_values(cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk, pct_cheese, pct_cream, **constants)
+    return project_cash_flows(values, years=years, discount_rate=discount_rate, growth_rates=growth_rates,
+                              replacement_lives=replacement_lives, capex_growth=capex_growth, fx_growth=fx_growth, fx_path=fx_path)
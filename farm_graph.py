@@ -0,0 +1,92 @@
+import numpy as np
+
+from farm_model import MODEL_INPUTS, PROJECTION_YEARS, REPORT_INPUTS, SUBSYSTEMS, assemble_results, resolve_constants, scenario_results
+
+REPORT_NODE = "report"
+
+# Outputs with a trailing year axis, broadcast separately when the report is assembled
+YEAR_AXIS_OUTPUTS = {"revenue_projections", "cost_projections", "profit_projections"}
+
+
+def _same(old, new):
+    return old is new or (np.shape(old) == np.shape(new) and np.array_equal(old, new))
+
+
+class FarmGraph:
+    """Incremental farm model built from the subsystems declared in ``farm_model.SUBSYSTEMS``.
+
+    Parameters are set with ``update``; ``evaluate`` re-runs only the subsystems downstream of a
+    parameter whose value actually changed and reuses every other cached intermediate. ``trace``
+    lists the nodes run by the last evaluation and ``run_counts`` the totals since construction.
+    Parameters may be scalars or arrays, as for ``calculate_farm_metrics_batch``.
+    """
+
+    def __init__(self, cows=100, deeded_ha=51, grassland_ha=35, greenhouse_ha=1.5, pct_milk=100, pct_cheese=0, pct_cream=0, **constants):
+        self.nodes = {name: (function, inputs, outputs) for name, function, inputs, outputs in SUBSYSTEMS}
+        self.nodes[REPORT_NODE] = (None, sorted({o for _, _, _, outputs in SUBSYSTEMS for o in outputs} | set(REPORT_INPUTS)), [])
+        self.order = list(self.nodes)
+
+        self.consumers = {}
+        for name, (_, inputs, _) in self.nodes.items():
+            for value in inputs:
+                self.consumers.setdefault(value, set()).add(name)
+        # Downstream closure of every node, walking the order backwards so each node's consumers are already known
+        self.downstream = {}
+        for name in reversed(self.order):
+            closure = {name}
+            for output in self.nodes[name][2]:
+                for consumer in self.consumers.get(output, ()):
+                    closure |= self.downstream[consumer]
+            self.downstream[name] = closure
+
+        self.values = {}
+        self.dirty = set(self.order)
+        self.trace = []
+        self.run_counts = dict.fromkeys(self.order, 0)
+        self.results = None
+        params = dict(zip(MODEL_INPUTS, (cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk, pct_cheese, pct_cream)))
+        params.update(resolve_constants(constants))
+        for name, value in params.items():
+            self.values[name] = np.asarray(value, dtype=float)
+
+    def update(self, **params):
+        """Set parameters; returns the names of the nodes that became stale."""
+        unknown = set(params) - set(MODEL_INPUTS)
+        if unknown:
+            raise TypeError(f"Unknown farm parameters: {', '.join(sorted(unknown))}")
+        stale = set()
+        for name, value in params.items():
+            value = np.asarray(value, dtype=float)
+            if _same(self.values[name], value):
+                continue
+            self.values[name] = value
+            for consumer in self.consumers.get(name, ()):
+                stale |= self.downstream[consumer]
+        self.dirty |= stale
+        return stale
+
+    def evaluate(self):
+        """Bring every stale node up to date and return the batch-style results dict."""
+        self.trace = []
+        for name in self.order:
+            if name not in self.dirty:
+                continue
+            function, inputs, outputs = self.nodes[name]
+            if name == REPORT_NODE:
+                # Subsystems only see the parameters they use, so broadcast before assembling the report
+                flat = [i for i in inputs if i not in YEAR_AXIS_OUTPUTS]
+                report_inputs = dict(zip(flat, np.broadcast_arrays(*[self.values[i] for i in flat])))
+                year_shape = np.shape(report_inputs[flat[0]]) + (len(PROJECTION_YEARS),)
+                for i in YEAR_AXIS_OUTPUTS:
+                    report_inputs[i] = np.broadcast_to(self.values[i], year_shape)
+                self.results = assemble_results(report_inputs)
+            else:
+                self.values.update(function(*[self.values[i] for i in inputs]))
+            self.trace.append(name)
+            self.run_counts[name] += 1
+        self.dirty.clear()
+        return self.results
+
+    def scenario_results(self, product="Tomato"):
+        """Evaluate and return the scalar ``(results, warning)`` pair for a single-scenario graph."""
+        return scenario_results(self.evaluate(), (), product)
@@ -0,0 +1,128 @@
+"""Load generator for farm_service.py: reports throughput and latency percentiles.
+
+    python farm_service.py --port 8000 &
+    python farm_loadgen.py --url http://127.0.0.1:8000 --concurrency 32 --requests 5000 --bulk 1
+
+Each of ``--concurrency`` clients keeps one keep-alive connection open and sends requests back to back, so the
+service sees that many requests in flight. Scenarios are random farm designs and prices; ``--distinct`` draws them
+from a fixed pool instead, to measure the response cache.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from urllib.parse import urlsplit
+
+from farm_model import CONSTANT_RANGES, PRODUCT_OPTIONS
+
+SAMPLED_CONSTANTS = ["milk_yield_liters", "milk_price_usd", "manure_per_cow_kg", "purchased_feed_cost_usd"]
+
+
+def random_scenario(rng):
+    deeded_ha = rng.randrange(10, 201, 5)
+    scenario = {
+        "cows": rng.randrange(10, 501, 10),
+        "deeded_ha": deeded_ha,
+        "grassland_ha": rng.randrange(0, deeded_ha, 5),
+        "greenhouse_ha": round(rng.uniform(0.01, 10.0), 2),
+        "product": rng.choice(PRODUCT_OPTIONS)
+    }
+    for name in SAMPLED_CONSTANTS:
+        low, mid, high = CONSTANT_RANGES[name]
+        scenario[name] = round(rng.triangular(low, high, mid), 4)
+    return scenario
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+async def request(reader, writer, host, method, path, payload=None):
+    """Send one HTTP/1.1 request on an open connection and return ``(status, decoded JSON body)``."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def run_load(host, port, concurrency=32, requests=5000, bulk=1, distinct=0, seed=0):
+    """Drive the service and return the latency list (seconds), error count, wall time and the server's /stats."""
+    rng = random.Random(seed)
+    pool = [random_scenario(rng) for _ in range(distinct)]
+    payloads = []
+    for _ in range(requests):
+        scenarios = [rng.choice(pool) if pool else random_scenario(rng) for _ in range(bulk)]
+        payloads.append(("/v1/farm-metrics", scenarios[0]) if bulk == 1 else ("/v1/farm-metrics/bulk", {"scenarios": scenarios}))
+
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def client():
+        nonlocal errors, next_index
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while next_index < len(payloads):
+                path, payload = payloads[next_index]
+                next_index += 1
+                start = time.perf_counter()
+                status, _ = await request(reader, writer, host, "POST", path, payload)
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, stats = await request(reader, writer, host, "GET", "/stats")
+    finally:
+        writer.close()
+    return sorted(latencies), errors, elapsed, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure throughput and latency of the farm service.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Service URL (default: http://127.0.0.1:8000)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent connections (default: 32)")
+    parser.add_argument("--requests", type=int, default=5000, help="Total requests (default: 5000)")
+    parser.add_argument("--bulk", type=int, default=1, help="Scenarios per request; above 1 uses the bulk endpoint (default: 1)")
+    parser.add_argument("--distinct", type=int, default=0, help="Draw scenarios from a pool of this size (default: all unique)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    url = urlsplit(args.url)
+    latencies, errors, elapsed, stats = asyncio.run(run_load(url.hostname, url.port or 80, args.concurrency, args.requests,
+                                                             args.bulk, args.distinct, args.seed))
+    print(f"Requests:     {len(latencies):,} ({errors:,} errors) in {elapsed:.2f}s")
+    print(f"Throughput:   {len(latencies) / elapsed:,.0f} requests/s, {len(latencies) * args.bulk / elapsed:,.0f} scenarios/s")
+    print("Latency (ms): " + ", ".join(f"p{p:g} {percentile(latencies, p) * 1000:.2f}" for p in (50, 90, 99))
+          + f", max {latencies[-1] * 1000:.2f}")
+    print(f"Server:       {stats['Batches']:,} batches, mean batch size {stats['Mean Batch Size']:.1f}, "
+          f"cache hit rate {stats['Cache']['Hit Rate']:.1%}")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
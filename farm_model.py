@@ -0,0 +1,406 @@
+import numpy as np
+
+# Fixed assumptions: Cheese yield 0.1 kg/L milk (10L/kg), Cream 0.04 kg/L (4% fat)
+CHEESE_YIELD_KG_PER_L = 0.1
+CREAM_YIELD_KG_PER_L = 0.04
+BUILDINGS_HA = 1
+
+# 5-year projection growth rates
+PROJECTION_YEARS = [1, 2, 3, 4, 5]
+REVENUE_GROWTH = 0.02
+COST_GROWTH = 0.03
+
+PRODUCT_OPTIONS = ["Tomato", "Lettuce", "Strawberry", "Cucumber"]
+
+# Preset ranges for product yields (tons/ha/year) and prices (USD/kg) as (Low, Mid, High)
+PRODUCT_RANGES = {
+    "Tomato": {"yield": (100.0, 300.0, 600.0), "price": (0.1, 0.25, 0.4)},
+    "Lettuce": {"yield": (200.0, 350.0, 500.0), "price": (0.5, 1.0, 1.5)},
+    "Strawberry": {"yield": (50.0, 75.0, 100.0), "price": (1.0, 2.0, 3.0)},
+    "Cucumber": {"yield": (200.0, 350.0, 500.0), "price": (0.2, 0.35, 0.5)}
+}
+
+# Editable constants as (Low, Mid, High); Mid is the default
+CONSTANT_RANGES = {
+    # Currency
+    "usd_to_try": (30.0, 40.0, 50.0),
+    # Dairy
+    "milk_yield_liters": (20.0, 25.0, 30.0),
+    "milk_price_usd": (0.3, 0.4, 0.5),
+    "cheese_price_usd": (4.0, 5.0, 6.0),
+    "cream_price_usd": (2.0, 3.0, 4.0),
+    # Biogas/Energy
+    "manure_per_cow_kg": (40.0, 60.0, 80.0),
+    "vs_fraction": (0.08, 0.096, 0.12),
+    "biogas_yield_m3_kg": (0.2, 0.3, 0.45),
+    "energy_per_m3_kwh": (5.0, 6.0, 7.0),
+    "electrical_efficiency": (0.3, 0.35, 0.4),
+    "electricity_sell_price_usd": (0.08, 0.1, 0.12),
+    "electricity_purchase_price_usd": (0.12, 0.15, 0.18),
+    # Feed
+    "feed_dm_per_cow_kg": (6000.0, 6570.0, 7000.0),
+    "grassland_yield_kg_ha": (4000.0, 5250.0, 6500.0),
+    "feed_crop_yield_kg_ha": (12000.0, 15000.0, 18000.0),
+    "purchased_feed_cost_usd": (0.08, 0.1, 0.12),
+    # Costs
+    "greenhouse_cost_per_ha": (300000.0, 500000.0, 700000.0),
+    "farm_elec_per_cow_kwh_year": (400.0, 500.0, 600.0),
+    "gh_elec_per_ha_kwh_year": (500000.0, 1000000.0, 1500000.0)
+}
+
+
+def format_range(low_mid_high):
+    low, mid, high = low_mid_high
+    return f"Low: {low:g}, Mid: {mid:g}, High: {high:g}"
+
+
+def constant_ranges(product="Tomato"):
+    """(Low, Mid, High) for every editable constant, including the product yield and price."""
+    ranges = dict(CONSTANT_RANGES)
+    ranges["yield_tons_ha"] = PRODUCT_RANGES[product]["yield"]
+    ranges["product_price_usd"] = PRODUCT_RANGES[product]["price"]
+    return ranges
+
+
+def default_constants(product="Tomato"):
+    return {name: mid for name, (low, mid, high) in constant_ranges(product).items()}
+
+
+def resolve_constants(constants):
+    """Merge ``constants`` over the Mid defaults, rejecting unknown names."""
+    unknown = set(constants) - set(constant_ranges())
+    if unknown:
+        raise TypeError(f"Unknown farm constants: {', '.join(sorted(unknown))}")
+    resolved = default_constants()
+    resolved.update(constants)
+    return resolved
+
+
+def land_feed_balance(cows, deeded_ha, grassland_ha, greenhouse_ha, feed_dm_per_cow_kg, grassland_yield_kg_ha, feed_crop_yield_kg_ha):
+    """Annual land allocation and feed balance (kg DM) for arrays of farms."""
+    # Land requirements
+    pasture_ha = np.minimum(grassland_ha, cows * (feed_dm_per_cow_kg / 2) / grassland_yield_kg_ha)
+    buildings_ha = BUILDINGS_HA
+    feed_crop_ha = np.maximum(0, deeded_ha - pasture_ha - greenhouse_ha - buildings_ha)
+
+    # Land check
+    feed_needed_kg = cows * feed_dm_per_cow_kg
+    pasture_feed_kg = pasture_ha * grassland_yield_kg_ha
+    required_feed_crop_ha = np.maximum(0, (feed_needed_kg - pasture_feed_kg) / feed_crop_yield_kg_ha)
+    total_required_ha = pasture_ha + greenhouse_ha + buildings_ha + required_feed_crop_ha
+
+    # Feed sufficiency
+    crop_feed_kg = feed_crop_ha * feed_crop_yield_kg_ha
+    total_feed_kg = pasture_feed_kg + crop_feed_kg
+    purchased_feed_kg = np.maximum(0, feed_needed_kg - total_feed_kg)
+
+    return {
+        "pasture_ha": pasture_ha,
+        "feed_crop_ha": feed_crop_ha,
+        "total_required_ha": total_required_ha,
+        "feed_needed_kg": feed_needed_kg,
+        "pasture_feed_kg": pasture_feed_kg,
+        "crop_feed_kg": crop_feed_kg,
+        "purchased_feed_kg": purchased_feed_kg
+    }
+
+
+def investment_costs(cows, greenhouse_ha, greenhouse_cost_per_ha):
+    cost_cows = cows * 3000.0
+    cost_greenhouse = greenhouse_ha * greenhouse_cost_per_ha
+    cost_infrastructure = 80000.0 * (cows / 60)
+    cost_bioenergy = 50000.0 * (cows / 60)
+    cost_equipment = 30000.0 * (cows / 60)
+    cost_supplies = 10000.0 * (cows / 60)
+    total_investment = cost_cows + cost_greenhouse + cost_infrastructure + cost_bioenergy + cost_equipment + cost_supplies
+    return {
+        "total_investment": total_investment,
+        "cost_greenhouse": cost_greenhouse,
+        "cost_bioenergy": cost_bioenergy,
+        "cost_equipment": cost_equipment
+    }
+
+
+def operating_costs(cows, greenhouse_ha, purchased_feed_kg, purchased_feed_cost_usd):
+    return {
+        "cost_feed": purchased_feed_kg * purchased_feed_cost_usd,
+        "cost_labor": 36000.0 * (cows / 60 + greenhouse_ha / 1.5),
+        "cost_vet": cows * 50.0,
+        "cost_utilities": 5000.0 * (cows / 60),
+        "cost_marketing": 3000.0 * (cows / 60),
+        "cost_greenhouse_ops": 10000.0 * (greenhouse_ha / 1.5),
+        "cost_maintenance": 5000.0 * (cows / 60)
+    }
+
+
+def dairy_production(cows, milk_yield_liters, pct_milk, pct_cheese, pct_cream, milk_price_usd, cheese_price_usd, cream_price_usd):
+    milk_liters_day = cows * milk_yield_liters
+    raw_milk_liters_day = milk_liters_day * (pct_milk / 100)
+    cheese_kg_day = (milk_liters_day * (pct_cheese / 100)) * CHEESE_YIELD_KG_PER_L
+    cream_kg_day = (milk_liters_day * (pct_cream / 100)) * CREAM_YIELD_KG_PER_L
+    dairy_revenue_day = raw_milk_liters_day * milk_price_usd + cheese_kg_day * cheese_price_usd + cream_kg_day * cream_price_usd
+    return {
+        "raw_milk_liters_day": raw_milk_liters_day,
+        "cheese_kg_day": cheese_kg_day,
+        "cream_kg_day": cream_kg_day,
+        "dairy_revenue_day": dairy_revenue_day,
+        "dairy_revenue_year": dairy_revenue_day * 365
+    }
+
+
+def greenhouse_production(greenhouse_ha, yield_tons_ha, product_price_usd):
+    product_kg_day = greenhouse_ha * yield_tons_ha * 1000 / 365
+    product_revenue_day = product_kg_day * product_price_usd
+    return {
+        "product_kg_day": product_kg_day,
+        "product_revenue_day": product_revenue_day,
+        "product_revenue_year": product_revenue_day * 365
+    }
+
+
+def biogas_production(cows, manure_per_cow_kg, vs_fraction, biogas_yield_m3_kg, energy_per_m3_kwh, electrical_efficiency):
+    manure_kg_day = cows * manure_per_cow_kg
+    vs_kg_day = manure_kg_day * vs_fraction
+    biogas_m3_day = vs_kg_day * biogas_yield_m3_kg
+    return {
+        "manure_kg_day": manure_kg_day,
+        "vs_kg_day": vs_kg_day,
+        "biogas_m3_day": biogas_m3_day,
+        "electricity_kwh_day": biogas_m3_day * energy_per_m3_kwh * electrical_efficiency
+    }
+
+
+def energy_balance(electricity_kwh_day, cows, greenhouse_ha, farm_elec_per_cow_kwh_year, gh_elec_per_ha_kwh_year,
+                   electricity_sell_price_usd, electricity_purchase_price_usd):
+    farm_electricity_need_kwh_day = (cows * farm_elec_per_cow_kwh_year / 365) + (greenhouse_ha * gh_elec_per_ha_kwh_year / 365)
+    surplus_kwh_day = np.maximum(0, electricity_kwh_day - farm_electricity_need_kwh_day)
+    shortfall_kwh_day = np.maximum(0, farm_electricity_need_kwh_day - electricity_kwh_day)
+    electricity_revenue_day = surplus_kwh_day * electricity_sell_price_usd
+    return {
+        "farm_electricity_need_kwh_day": farm_electricity_need_kwh_day,
+        "surplus_kwh_day": surplus_kwh_day,
+        "shortfall_kwh_day": shortfall_kwh_day,
+        "electricity_revenue_day": electricity_revenue_day,
+        "electricity_revenue_year": electricity_revenue_day * 365,
+        "electricity_purchase_cost_year": shortfall_kwh_day * 365 * electricity_purchase_price_usd,
+        "electricity_purchase_day": shortfall_kwh_day * electricity_purchase_price_usd
+    }
+
+
+def farm_financials(dairy_revenue_year, product_revenue_year, electricity_revenue_year, cost_feed, cost_labor, cost_vet,
+                    cost_utilities, cost_marketing, cost_greenhouse_ops, cost_maintenance, electricity_purchase_cost_year, total_investment):
+    total_revenue_year = dairy_revenue_year + product_revenue_year + electricity_revenue_year
+    total_costs = cost_feed + cost_labor + cost_vet + cost_utilities + cost_marketing + cost_greenhouse_ops + cost_maintenance + electricity_purchase_cost_year
+    annual_profit = total_revenue_year - total_costs
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payback_period = np.where(annual_profit > 0, total_investment / annual_profit, np.inf)
+    return {
+        "total_revenue_year": total_revenue_year,
+        "total_costs": total_costs,
+        "annual_profit": annual_profit,
+        "payback_period": payback_period
+    }
+
+
+def financial_projections(total_revenue_year, total_costs):
+    # Growth factors computed in Python so each year matches the scalar model bit for bit
+    revenue_growth = np.array([(1 + REVENUE_GROWTH) ** (year - 1) for year in PROJECTION_YEARS])
+    cost_growth = np.array([(1 + COST_GROWTH) ** (year - 1) for year in PROJECTION_YEARS])
+    revenue_projections = np.asarray(total_revenue_year)[..., np.newaxis] * revenue_growth
+    cost_projections = np.asarray(total_costs)[..., np.newaxis] * cost_growth
+    return {
+        "revenue_projections": revenue_projections,
+        "cost_projections": cost_projections,
+        "profit_projections": revenue_projections - cost_projections
+    }
+
+
+# Model parameters in the positional order of calculate_farm_metrics_batch, then the constants
+DESIGN_INPUTS = ["cows", "deeded_ha", "grassland_ha", "greenhouse_ha", "pct_milk", "pct_cheese", "pct_cream"]
+MODEL_INPUTS = DESIGN_INPUTS + list(constant_ranges())
+
+# Subsystems in dependency order as (name, function, inputs, outputs); every function returns a dict of its outputs
+SUBSYSTEMS = [
+    ("land_feed", land_feed_balance,
+     ["cows", "deeded_ha", "grassland_ha", "greenhouse_ha", "feed_dm_per_cow_kg", "grassland_yield_kg_ha", "feed_crop_yield_kg_ha"],
+     ["pasture_ha", "feed_crop_ha", "total_required_ha", "feed_needed_kg", "pasture_feed_kg", "crop_feed_kg", "purchased_feed_kg"]),
+    ("investment", investment_costs,
+     ["cows", "greenhouse_ha", "greenhouse_cost_per_ha"],
+     ["total_investment", "cost_greenhouse", "cost_bioenergy", "cost_equipment"]),
+    ("operating_costs", operating_costs,
+     ["cows", "greenhouse_ha", "purchased_feed_kg", "purchased_feed_cost_usd"],
+     ["cost_feed", "cost_labor", "cost_vet", "cost_utilities", "cost_marketing", "cost_greenhouse_ops", "cost_maintenance"]),
+    ("dairy", dairy_production,
+     ["cows", "milk_yield_liters", "pct_milk", "pct_cheese", "pct_cream", "milk_price_usd", "cheese_price_usd", "cream_price_usd"],
+     ["raw_milk_liters_day", "cheese_kg_day", "cream_kg_day", "dairy_revenue_day", "dairy_revenue_year"]),
+    ("greenhouse", greenhouse_production,
+     ["greenhouse_ha", "yield_tons_ha", "product_price_usd"],
+     ["product_kg_day", "product_revenue_day", "product_revenue_year"]),
+    ("biogas", biogas_production,
+     ["cows", "manure_per_cow_kg", "vs_fraction", "biogas_yield_m3_kg", "energy_per_m3_kwh", "electrical_efficiency"],
+     ["manure_kg_day", "vs_kg_day", "biogas_m3_day", "electricity_kwh_day"]),
+    ("energy_balance", energy_balance,
+     ["electricity_kwh_day", "cows", "greenhouse_ha", "farm_elec_per_cow_kwh_year", "gh_elec_per_ha_kwh_year",
+      "electricity_sell_price_usd", "electricity_purchase_price_usd"],
+     ["farm_electricity_need_kwh_day", "surplus_kwh_day", "shortfall_kwh_day", "electricity_revenue_day",
+      "electricity_revenue_year", "electricity_purchase_cost_year", "electricity_purchase_day"]),
+    ("financials", farm_financials,
+     ["dairy_revenue_year", "product_revenue_year", "electricity_revenue_year", "cost_feed", "cost_labor", "cost_vet",
+      "cost_utilities", "cost_marketing", "cost_greenhouse_ops", "cost_maintenance", "electricity_purchase_cost_year", "total_investment"],
+     ["total_revenue_year", "total_costs", "annual_profit", "payback_period"]),
+    ("projections", financial_projections,
+     ["total_revenue_year", "total_costs"],
+     ["revenue_projections", "cost_projections", "profit_projections"])
+]
+
+# Values read by assemble_results in addition to the subsystem outputs
+REPORT_INPUTS = ["usd_to_try", "deeded_ha"]
+
+
+def assemble_results(v):
+    """Build the nested results dict from the flat namespace of parameters and subsystem outputs."""
+    return {
+        "Investment (USD)": v["total_investment"],
+        "Investment (TRY)": v["total_investment"] * v["usd_to_try"],
+        "Operating Costs (USD)": v["total_costs"],
+        "Operating Costs (TRY)": v["total_costs"] * v["usd_to_try"],
+        "Revenue (USD)": v["total_revenue_year"],
+        "Revenue (TRY)": v["total_revenue_year"] * v["usd_to_try"],
+        "Profit (USD)": v["annual_profit"],
+        "Profit (TRY)": v["annual_profit"] * v["usd_to_try"],
+        "Payback Period (Years)": v["payback_period"],
+        "Daily Costs": {
+            "Feed (USD)": v["cost_feed"] / 365,
+            "Labor (USD)": v["cost_labor"] / 365,
+            "Veterinary (USD)": v["cost_vet"] / 365,
+            "Utilities (USD)": v["cost_utilities"] / 365,
+            "Marketing (USD)": v["cost_marketing"] / 365,
+            "Greenhouse Ops (USD)": v["cost_greenhouse_ops"] / 365,
+            "Maintenance (USD)": v["cost_maintenance"] / 365,
+            "Electricity Purchase (USD)": v["electricity_purchase_day"]
+        },
+        "Daily Products": {
+            "Dairy (liters/day raw milk)": v["raw_milk_liters_day"],
+            "Cheese (kg/day)": v["cheese_kg_day"],
+            "Cream (kg/day)": v["cream_kg_day"],
+            "Dairy (USD/day)": v["dairy_revenue_day"],
+            "Product (kg/day)": v["product_kg_day"],
+            "Product (USD/day)": v["product_revenue_day"],
+            "Electricity Produced (kWh/day)": v["electricity_kwh_day"],
+            "Electricity Consumed (kWh/day)": v["farm_electricity_need_kwh_day"],
+            "Surplus Electricity (kWh/day)": v["surplus_kwh_day"],
+            "Surplus Electricity (USD/day)": v["electricity_revenue_day"],
+            "Shortfall Electricity (kWh/day)": v["shortfall_kwh_day"]
+        },
+        "Projections": {"Years": list(PROJECTION_YEARS), "Revenue": v["revenue_projections"],
+                        "Costs": v["cost_projections"], "Profit": v["profit_projections"]},
+        "Dairy Revenue Year": v["dairy_revenue_year"],
+        "Product Revenue Year": v["product_revenue_year"],
+        "Electricity Revenue Year": v["electricity_revenue_year"],
+        "Purchased Feed Kg": v["purchased_feed_kg"],
+        "Electricity Purchase Cost Year": v["electricity_purchase_cost_year"],
+        "Shortfall Kwh Year": v["shortfall_kwh_day"] * 365,
+        "Purchased Feed Cost Year": v["cost_feed"],
+        "Required Land (ha)": v["total_required_ha"],
+        "Deeded Land (ha)": v["deeded_ha"]
+    }
+
+
+def model_values(cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk=100, pct_cheese=0, pct_cream=0, **constants):
+    """Run every subsystem and return the flat namespace of broadcast parameters and subsystem outputs."""
+    c = resolve_constants(constants)
+    params = [cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk, pct_cheese, pct_cream] + [c[name] for name in MODEL_INPUTS[len(DESIGN_INPUTS):]]
+    values = dict(zip(MODEL_INPUTS, np.broadcast_arrays(*[np.asarray(value, dtype=float) for value in params])))
+    for name, function, inputs, outputs in SUBSYSTEMS:
+        values.update(function(*[values[i] for i in inputs]))
+    return values
+
+
+def calculate_farm_metrics_batch(cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk=100, pct_cheese=0, pct_cream=0, **constants):
+    """Vectorized farm model.
+
+    Every argument may be a scalar or an array; all are broadcast together and each
+    result is a float64 array of the broadcast shape (projections gain a trailing year axis).
+    Constants not given fall back to their Mid values (Tomato for the product yield/price).
+    """
+    return assemble_results(model_values(cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk, pct_cheese, pct_cream, **constants))
+
+
+def flatten_results(batch):
+    """Flatten a batch result into 1-D columns, e.g. ``Daily Costs.Feed (USD)`` and ``Projections.Profit.Year 3``."""
+    columns = {}
+    for key, value in batch.items():
+        if key in ("Daily Costs", "Daily Products"):
+            for name, values in value.items():
+                columns[f"{key}.{name}"] = values
+        elif key == "Projections":
+            for name in ("Revenue", "Costs", "Profit"):
+                for i, year in enumerate(value["Years"]):
+                    columns[f"{key}.{name}.Year {year}"] = value[name][..., i]
+        elif key != "Deeded Land (ha)":
+            columns[key] = value
+    columns["Land Warning"] = batch["Required Land (ha)"] > batch["Deeded Land (ha)"]
+    return columns
+
+
+def land_warning(required_ha, deeded_ha):
+    if required_ha > deeded_ha:
+        return f"Warning: For full feed self-sufficiency, need {required_ha:.1f} ha (using purchased feed instead)."
+    return None
+
+
+def scenario_results(batch, index=(), product="Tomato"):
+    """Pull one scenario out of a batch result as the scalar ``(results, warning)`` pair."""
+    def pick(values):
+        return float(values[index])
+
+    results = {}
+    for key, value in batch.items():
+        if key == "Daily Costs":
+            results[key] = {name: pick(values) for name, values in value.items()}
+        elif key == "Daily Products":
+            results[key] = {name.replace("Product", product, 1) if name.startswith("Product ") else name: pick(values)
+                            for name, values in value.items()}
+        elif key == "Projections":
+            results[key] = {"Years": list(value["Years"])}
+            for name in ("Revenue", "Costs", "Profit"):
+                results[key][name] = [float(v) for v in value[name][index]]
+        elif key not in ("Required Land (ha)", "Deeded Land (ha)"):
+            results[key] = pick(value)
+    warning = land_warning(pick(batch["Required Land (ha)"]), pick(batch["Deeded Land (ha)"]))
+    return results, warning
+
+
+def calculate_farm_metrics(cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk=100, pct_cheese=0, pct_cream=0, product="Tomato", **constants):
+    """Single-scenario model returning ``(results, warning)`` as shown in the app."""
+    constants = {**default_constants(product), **constants}
+    batch = calculate_farm_metrics_batch(cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk, pct_cheese, pct_cream, **constants)
+    return scenario_results(batch, (), product)
+
+
+def scenario_columns(scenarios):
+    """Turn a list of ``calculate_farm_metrics`` keyword-argument dicts into ``(columns, products)``.
+
+    ``columns`` maps every name in ``MODEL_INPUTS`` to a float array with one entry per scenario; missing values use
+    the defaults of that scenario's product.
+    """
+    products = [scenario.get("product", "Tomato") for scenario in scenarios]
+    defaults = {product: {"pct_milk": 100, "pct_cheese": 0, "pct_cream": 0, **default_constants(product)} for product in set(products)}
+    for scenario in scenarios:
+        unknown = set(scenario) - set(MODEL_INPUTS) - {"product"}
+        if unknown:
+            raise TypeError(f"Unknown farm parameters: {', '.join(sorted(unknown))}")
+    columns = {name: np.array([scenario[name] if name in scenario else defaults[product][name]
+                               for scenario, product in zip(scenarios, products)], dtype=float)
+               for name in MODEL_INPUTS}
+    return columns, products
+
+
+def calculate_scenarios(scenarios):
+    """Evaluate a list of scenarios, each a dict of ``calculate_farm_metrics`` keyword arguments, in one vectorized call.
+
+    Returns the ``(results, warning)`` pair of every scenario, in order, exactly as ``calculate_farm_metrics`` would.
+    """
+    columns, products = scenario_columns(scenarios)
+    batch = calculate_farm_metrics_batch(**columns)
+    return [scenario_results(batch, i, product) for i, product in enumerate(products)]
@@ -0,0 +1,102 @@
+import numpy as np
+
+from farm_cashflow import project_cash_flows
+from farm_model import assemble_results, constant_ranges, model_values
+
+DISTRIBUTIONS = ("triangular", "uniform")
+
+# Outputs kept per sample; every other model column is dropped chunk by chunk
+MONTE_CARLO_METRICS = ["Profit (USD)", "Payback Period (Years)", "Shortfall Kwh Year"]
+# Metrics that have no finite value for some draws; their share is reported as the given key and no mean is taken
+UNBOUNDED_METRICS = {"Payback Period (Years)": "P(No Payback)", "IRR": "P(No IRR)",
+                     "Discounted Payback Period (Years)": "P(No Discounted Payback)"}
+# Added when run_monte_carlo is given cash-flow options
+CASH_FLOW_METRICS = ["NPV (USD)", "IRR", "Discounted Payback Period (Years)"]
+
+
+def triangular_ppf(u, low, mode, high):
+    """Inverse CDF of the triangular distribution, vectorized over ``u``."""
+    u = np.asarray(u, dtype=float)
+    width = high - low
+    split = (mode - low) / width if width > 0 else 0.5
+    return np.where(u < split,
+                    low + np.sqrt(u * width * (mode - low)),
+                    high - np.sqrt((1 - u) * width * (high - mode)))
+
+
+def uniform_ppf(u, low, mode, high):
+    return low + np.asarray(u, dtype=float) * (high - low)
+
+
+_PPF = {"triangular": triangular_ppf, "uniform": uniform_ppf}
+
+
+def transform_uniforms(u, names, ranges, distribution="triangular", distributions=None):
+    """Map a (samples, len(names)) matrix of U(0, 1) draws onto the Low/Mid/High ranges."""
+    distributions = distributions or {}
+    samples = {}
+    for column, name in enumerate(names):
+        kind = distributions.get(name, distribution)
+        if kind not in _PPF:
+            raise ValueError(f"Unknown distribution '{kind}' for {name}; expected one of {', '.join(DISTRIBUTIONS)}")
+        samples[name] = _PPF[kind](u[:, column], *ranges[name])
+    return samples
+
+
+def run_monte_carlo(cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk=100, pct_cheese=0, pct_cream=0, product="Tomato",
+                    n_samples=1_000_000, seed=None, chunk_size=250_000, distribution="triangular", distributions=None,
+                    fixed=None, percentiles=(10, 50, 90), histogram_bins=50, cash_flow=None):
+    """Sample every editable constant from its Low/Mid/High range and summarize the spread of outcomes.
+
+    The farm design is held fixed. Constants named in ``fixed`` keep the given value instead of being sampled.
+    Samples are drawn and evaluated ``chunk_size`` at a time, so peak memory is bounded by the chunk size plus
+    one float per sample for each of ``MONTE_CARLO_METRICS``. The same seed and chunk size reproduce a run.
+    ``UNBOUNDED_METRICS`` get the share of draws without a finite value instead of a mean.
+    ``cash_flow`` (keyword arguments for ``farm_cashflow.project_cash_flows``) adds the ``CASH_FLOW_METRICS``.
+    Draws without an IRR stay in the IRR percentiles as -inf (or +inf when their NPV is positive at every rate).
+    """
+    if n_samples < 1:
+        raise ValueError("n_samples must be at least 1")
+    fixed = dict(fixed or {})
+    ranges = constant_ranges(product)
+    names = [name for name in ranges if name not in fixed]
+    metrics = MONTE_CARLO_METRICS + (CASH_FLOW_METRICS if cash_flow is not None else [])
+    outputs = {metric: np.empty(n_samples) for metric in metrics}
+
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_samples, chunk_size):
+        stop = min(start + chunk_size, n_samples)
+        u = rng.random((stop - start, len(names)))
+        sampled = transform_uniforms(u, names, ranges, distribution, distributions)
+        values = model_values(cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk, pct_cheese, pct_cream, **fixed, **sampled)
+        batch = assemble_results(values)
+        if cash_flow is not None:
+            # Only the cash-flow metrics: its payback shares a key with the model's investment / year-1 profit payback
+            cash_flows = project_cash_flows(values, **cash_flow)
+            batch.update({metric: cash_flows[metric] for metric in CASH_FLOW_METRICS})
+        for metric in metrics:
+            outputs[metric][start:stop] = batch[metric]
+
+    if cash_flow is not None:
+        # Without a sign change on the IRR grid the NPV has one sign at every rate, which ranks the draw
+        irr = outputs["IRR"]
+        missing = np.isnan(irr)
+        irr[missing] = np.where(outputs["NPV (USD)"][missing] > 0, np.inf, -np.inf)
+
+    # inverted_cdf never interpolates, so infinite tails stay inf instead of turning into nan
+    summary = {"Samples": n_samples, "Percentiles": list(percentiles)}
+    for metric, values in outputs.items():
+        bands = np.percentile(values, percentiles, method="inverted_cdf")
+        summary[metric] = {f"P{p:g}": float(band) for p, band in zip(percentiles, bands)}
+        if metric in UNBOUNDED_METRICS:
+            summary[UNBOUNDED_METRICS[metric]] = float(np.count_nonzero(~np.isfinite(values)) / n_samples)
+        else:
+            summary[metric]["Mean"] = float(values.mean())
+    profit = outputs["Profit (USD)"]
+    summary["P(Profit < 0)"] = float(np.count_nonzero(profit < 0) / n_samples)
+    summary["P(Shortfall > 0)"] = float(np.count_nonzero(outputs["Shortfall Kwh Year"] > 0) / n_samples)
+    if cash_flow is not None:
+        summary["P(NPV < 0)"] = float(np.count_nonzero(outputs["NPV (USD)"] < 0) / n_samples)
+    counts, edges = np.histogram(profit, bins=histogram_bins)
+    summary["Profit Histogram"] = {"Counts": counts.tolist(), "Edges": edges.tolist()}
+    return summary
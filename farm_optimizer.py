@@ -0,0 +1,130 @@
+import numpy as np
+
+from farm_model import BUILDINGS_HA, calculate_farm_metrics_batch
+
+# Same bounds as the design widgets in the app
+COW_BOUNDS = (10, 500)
+GREENHOUSE_BOUNDS = (0.01, 10.0)
+GRASSLAND_BOUNDS = (0, 200)
+
+OBJECTIVES = ("profit", "payback")
+
+
+def pareto_front(profit, investment):
+    """Mask of designs that no other design beats on profit (max) and investment (min).
+
+    Payback is investment / profit, so a design beaten on both of those is never better on payback
+    either; the 2-D front is therefore also the profit / investment / payback front.
+    """
+    order = np.lexsort((-profit, investment))
+    sorted_profit = profit[order]
+    best_before = np.concatenate([[-np.inf], np.maximum.accumulate(sorted_profit)[:-1]])
+    mask = np.zeros(len(profit), dtype=bool)
+    mask[order[sorted_profit > best_before]] = True
+    return mask
+
+
+def _evaluate(cows, greenhouse_ha, grassland_ha, deeded_ha, pct, constants, require_feed_self_sufficiency, require_no_shortfall):
+    batch = calculate_farm_metrics_batch(cows, deeded_ha, grassland_ha, greenhouse_ha, *pct, **constants)
+    feasible = grassland_ha + greenhouse_ha + BUILDINGS_HA <= deeded_ha
+    if require_feed_self_sufficiency:
+        feasible &= batch["Required Land (ha)"] <= deeded_ha
+    if require_no_shortfall:
+        feasible &= batch["Daily Products"]["Shortfall Electricity (kWh/day)"] == 0
+    return {
+        "Cows": cows,
+        "Greenhouse Area (ha)": greenhouse_ha,
+        "Grassland Area (ha)": grassland_ha,
+        "Profit (USD)": batch["Profit (USD)"],
+        "Investment (USD)": batch["Investment (USD)"],
+        "Payback Period (Years)": batch["Payback Period (Years)"],
+        "Feasible": feasible
+    }
+
+
+def _score(evaluated, objective):
+    # Lower is better; infeasible designs never win
+    if objective == "profit":
+        score = -evaluated["Profit (USD)"]
+    else:
+        score = evaluated["Payback Period (Years)"].copy()
+    return np.where(evaluated["Feasible"], score, np.inf)
+
+
+def _clip_design(cows, greenhouse_ha, grassland_ha, cow_bounds, greenhouse_bounds, grassland_bounds):
+    return (np.clip(np.round(cows), *cow_bounds),
+            np.clip(np.round(greenhouse_ha, 2), *greenhouse_bounds),
+            np.clip(np.round(grassland_ha), *grassland_bounds))
+
+
+def optimize_design(deeded_ha, pct_milk=100, pct_cheese=0, pct_cream=0, objective="profit", constants=None,
+                    require_feed_self_sufficiency=False, require_no_shortfall=False,
+                    cow_bounds=COW_BOUNDS, greenhouse_bounds=GREENHOUSE_BOUNDS, grassland_bounds=GRASSLAND_BOUNDS,
+                    grid_points=(50, 40, 41), refine_iterations=4, top_k=8):
+    """Search cows x greenhouse area x grassland area for the given deeded land and constants.
+
+    A coarse grid over the widget bounds is evaluated in one batch, then the ``top_k`` designs for
+    ``objective`` ("profit" to maximize, "payback" to minimize) are refined on successively finer local
+    grids down to 1 cow, 0.01 ha greenhouse and 1 ha grassland. Designs must fit grassland, greenhouse and
+    buildings on the deeded land; the optional constraints also require enough land for full feed
+    self-sufficiency and no electricity purchases. Returns the best design and the Pareto front of
+    profit vs. investment vs. payback over every feasible design evaluated.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {', '.join(OBJECTIVES)}")
+    constants = constants or {}
+    pct = (pct_milk, pct_cheese, pct_cream)
+    grassland_bounds = (grassland_bounds[0], max(grassland_bounds[0], min(grassland_bounds[1], deeded_ha - BUILDINGS_HA)))
+
+    def evaluate(cows, greenhouse_ha, grassland_ha):
+        return _evaluate(cows, greenhouse_ha, grassland_ha, deeded_ha, pct, constants,
+                         require_feed_self_sufficiency, require_no_shortfall)
+
+    # Coarse grid over the whole design space
+    axes = [np.linspace(*bounds, n) for bounds, n in zip((cow_bounds, greenhouse_bounds, grassland_bounds), grid_points)]
+    cows, greenhouse_ha, grassland_ha = (grid.ravel() for grid in np.meshgrid(*axes, indexing="ij"))
+    cows, greenhouse_ha, grassland_ha = _clip_design(cows, greenhouse_ha, grassland_ha, cow_bounds, greenhouse_bounds, grassland_bounds)
+    evaluated = [evaluate(cows, greenhouse_ha, grassland_ha)]
+    steps = np.array([np.ptp(bounds) / max(n - 1, 1) for bounds, n in zip((cow_bounds, greenhouse_bounds, grassland_bounds), grid_points)])
+    min_steps = np.array([1.0, 0.01, 1.0])
+
+    # Local refinement around the current leaders, halving the step each round
+    offsets = np.array(np.meshgrid(*[np.linspace(-1, 1, 5)] * 3, indexing="ij")).reshape(3, -1)
+    for _ in range(refine_iterations):
+        merged = {key: np.concatenate([e[key] for e in evaluated]) for key in evaluated[0]}
+        score = _score(merged, objective)
+        leaders = np.argsort(score)[:top_k]
+        leaders = leaders[np.isfinite(score[leaders])]
+        if not len(leaders):
+            break
+        steps = np.maximum(steps / 2, min_steps)
+        centers = np.stack([merged["Cows"][leaders], merged["Greenhouse Area (ha)"][leaders], merged["Grassland Area (ha)"][leaders]])
+        candidates = (centers[:, :, np.newaxis] + (offsets * steps[:, np.newaxis])[:, np.newaxis, :]).reshape(3, -1)
+        evaluated.append(evaluate(*_clip_design(*candidates, cow_bounds, greenhouse_bounds, grassland_bounds)))
+
+    merged = {key: np.concatenate([e[key] for e in evaluated]) for key in evaluated[0]}
+    designs = np.stack([merged["Cows"], merged["Greenhouse Area (ha)"], merged["Grassland Area (ha)"]], axis=1)
+    _, unique = np.unique(designs, axis=0, return_index=True)
+    merged = {key: values[unique] for key, values in merged.items()}
+    n_evaluated = len(designs)
+
+    feasible = merged["Feasible"]
+    # Evaluations counts every model run, including repeats; Feasible Designs is a subset of Unique Designs
+    result = {"Evaluations": n_evaluated, "Unique Designs": len(unique), "Feasible Designs": int(feasible.sum()),
+              "Best": None, "Pareto Front": []}
+    if not feasible.any():
+        return result
+
+    merged = {key: values[feasible] for key, values in merged.items()}
+    del merged["Feasible"]
+
+    def row(i):
+        return {key: float(values[i]) for key, values in merged.items()}
+
+    score = _score({**merged, "Feasible": np.ones(len(merged["Cows"]), dtype=bool)}, objective)
+    if np.isfinite(score).any():
+        result["Best"] = row(int(np.argmin(score)))
+    front = np.flatnonzero(pareto_front(merged["Profit (USD)"], merged["Investment (USD)"]))
+    front = front[np.argsort(merged["Investment (USD)"][front])]
+    result["Pareto Front"] = [row(i) for i in front]
+    return result
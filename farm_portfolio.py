@@ -0,0 +1,160 @@
+import numpy as np
+
+from farm_model import COST_GROWTH, REVENUE_GROWTH, model_values, scenario_columns
+from farm_seasonal import DAYS_PER_YEAR, SEASONAL_PROFILES, seasonal_profile
+
+# Central plant cost is the summed per-farm bioenergy investment scaled by (portfolio cows / 60) ** (exponent - 1),
+# so 1.0 means no economy of scale and the six-tenths rule is 0.6
+DEFAULT_DIGESTER_SCALE_EXPONENT = 1.0
+
+# Per-year quantities reported for every farm and summed for the portfolio
+QUANTITIES = [
+    "Manure to Digester (kg/year)",
+    "Electricity Produced (kWh/year)",
+    "Electricity Consumed (kWh/year)",
+    "Electricity Supplied to Members (kWh/year)",
+    "Electricity Received from Members (kWh/year)",
+    "Electricity Exported (kWh/year)",
+    "Electricity Imported (kWh/year)",
+    "Silage Supplied to Members (kg/year)",
+    "Silage Received from Members (kg/year)",
+    "Purchased Feed (kg/year)"
+]
+
+
+def _net_across_farms(surplus, deficit, enabled):
+    # Surplus farms supply deficit farms pro rata (axis 0 is the farm axis); only the remainder is traded outside
+    total_surplus = surplus.sum(axis=0)
+    total_deficit = deficit.sum(axis=0)
+    traded = np.minimum(total_surplus, total_deficit) if enabled else np.zeros_like(total_surplus)
+    supplied = surplus * np.divide(traded, total_surplus, out=np.zeros_like(traded), where=total_surplus > 0)
+    received = deficit * np.divide(traded, total_deficit, out=np.zeros_like(traded), where=total_deficit > 0)
+    return supplied, received
+
+
+def _payback(investment, profit):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(profit > 0, investment / profit, np.inf)
+
+
+def simulate_portfolio(farms, years=5, shared_digester=True, central_efficiency=None,
+                       digester_scale_exponent=DEFAULT_DIGESTER_SCALE_EXPONENT, manure_transport_usd_per_t=0.0,
+                       net_electricity=True, net_feed=True, electricity_transfer_price_usd=None, feed_transfer_price_usd=None,
+                       profiles=None, return_daily=False):
+    """Simulate a cooperative of member farms day by day and report per-farm and portfolio results.
+
+    ``farms`` is a list of ``calculate_farm_metrics`` keyword-argument dicts (cows, land, greenhouse, product and
+    any constants); a farm whose dairy allocation does not sum to 100% raises ``ValueError``. With
+    ``shared_digester`` all manure goes to one central plant (converting gas to power at ``central_efficiency``,
+    default each farm's ``electrical_efficiency``), whose output is credited back to the farms in proportion to the
+    gas from their manure. Each day, farms with an electricity surplus supply farms with a shortfall at
+    ``electricity_transfer_price_usd`` (default halfway between the sell and purchase prices) before anything is
+    sold to or bought from the grid; each year, spare feed-crop silage is likewise passed to farms that would
+    otherwise buy feed, at ``feed_transfer_price_usd`` (default the purchased feed cost). Transfers cancel out in
+    the portfolio totals. "Standalone Profit (USD)" is what each farm makes on its own, as in ``simulate_seasonal``.
+
+    The seasonal profiles repeat every year, so one year of (farms, 365) daily arrays is simulated and only the
+    revenue and cost growth differs between years.
+    """
+    if not farms:
+        raise ValueError("A portfolio needs at least one farm")
+    columns, products = scenario_columns(farms)
+    invalid = np.flatnonzero(columns["pct_milk"] + columns["pct_cheese"] + columns["pct_cream"] != 100)
+    if invalid.size:
+        raise ValueError(f"Dairy allocations must sum to 100% (farms {', '.join(str(i + 1) for i in invalid)})")
+    v = model_values(**columns)
+    profiles = {**SEASONAL_PROFILES, **(profiles or {})}
+    milk, manure, greenhouse_demand, crop, pasture = (
+        seasonal_profile(*profiles[name], DAYS_PER_YEAR)
+        for name in ["milk_yield", "manure", "greenhouse_electricity", "crop_yield", "pasture_growth"])
+
+    def daily(values):
+        return values[:, np.newaxis]
+
+    # Electricity: biogas from the shared plant or each farm's own, netted across farms every day
+    gas_kwh_day = v["biogas_m3_day"] * v["energy_per_m3_kwh"]
+    efficiency = v["electrical_efficiency"] if not shared_digester or central_efficiency is None else central_efficiency
+    consumed = daily(v["cows"] * v["farm_elec_per_cow_kwh_year"] / 365) + daily(v["greenhouse_ha"] * v["gh_elec_per_ha_kwh_year"] / 365) * greenhouse_demand
+    produced = daily(gas_kwh_day * efficiency) * manure
+    net = produced - consumed
+    surplus, shortfall = np.maximum(0, net), np.maximum(0, -net)
+    supplied, received = _net_across_farms(surplus, shortfall, net_electricity)
+    exported = surplus - supplied
+    imported = shortfall - received
+    standalone_net = daily(v["electricity_kwh_day"]) * manure - consumed
+
+    sell_price = v["electricity_sell_price_usd"]
+    purchase_price = v["electricity_purchase_price_usd"]
+    if electricity_transfer_price_usd is None:
+        electricity_transfer_price_usd = float(np.mean((sell_price + purchase_price) / 2))
+    electricity_revenue = exported.sum(axis=-1) * sell_price + supplied.sum(axis=-1) * electricity_transfer_price_usd
+    electricity_cost = imported.sum(axis=-1) * purchase_price + received.sum(axis=-1) * electricity_transfer_price_usd
+
+    # Feed: pasture is grazed as it grows; silage covers the rest and spare silage goes to other members
+    pasture_deficit_kg = np.maximum(0, daily(v["feed_needed_kg"]) / 365 - daily(v["pasture_feed_kg"]) / 365 * pasture).sum(axis=-1)
+    standalone_feed_kg = np.maximum(0, pasture_deficit_kg - v["crop_feed_kg"])
+    spare_silage_kg = np.maximum(0, v["crop_feed_kg"] - pasture_deficit_kg)
+    silage_supplied, silage_received = _net_across_farms(spare_silage_kg, standalone_feed_kg, net_feed)
+    purchased_feed_kg = standalone_feed_kg - silage_received
+    feed_price = v["purchased_feed_cost_usd"]
+    if feed_transfer_price_usd is None:
+        feed_transfer_price_usd = float(np.mean(feed_price))
+    feed_revenue = silage_supplied * feed_transfer_price_usd
+    feed_cost = purchased_feed_kg * feed_price + silage_received * feed_transfer_price_usd
+
+    # Shared plant: replaces each farm's bioenergy investment with a share of one central plant, plus manure haulage
+    manure_kg = v["manure_kg_day"] * manure.sum()
+    investment = v["total_investment"]
+    transport_cost = np.zeros_like(manure_kg)
+    if shared_digester:
+        total_cows = v["cows"].sum()
+        central_cost = v["cost_bioenergy"].sum() * (total_cows / 60) ** (digester_scale_exponent - 1) if total_cows > 0 else 0.0
+        cow_share = v["cows"] / total_cows if total_cows > 0 else np.zeros_like(manure_kg)
+        investment = investment - v["cost_bioenergy"] + central_cost * cow_share
+        transport_cost = manure_kg / 1000 * manure_transport_usd_per_t
+
+    farm_revenue = v["dairy_revenue_day"] * milk.sum() + v["product_revenue_day"] * crop.sum()
+    fixed_costs = v["total_costs"] - v["cost_feed"] - v["electricity_purchase_cost_year"]
+    revenue_growth = (1 + REVENUE_GROWTH) ** np.arange(years)
+    cost_growth = (1 + COST_GROWTH) ** np.arange(years)
+    revenue = daily(farm_revenue + electricity_revenue + feed_revenue) * revenue_growth
+    costs = daily(fixed_costs + feed_cost + electricity_cost + transport_cost) * cost_growth
+    standalone_revenue = daily(farm_revenue + np.maximum(0, standalone_net).sum(axis=-1) * sell_price) * revenue_growth
+    standalone_costs = daily(fixed_costs + standalone_feed_kg * feed_price
+                             + np.maximum(0, -standalone_net).sum(axis=-1) * purchase_price) * cost_growth
+    standalone_profit = standalone_revenue - standalone_costs
+
+    farm_results = {
+        "Product": products,
+        "Investment (USD)": investment,
+        "Revenue (USD)": revenue,
+        "Operating Costs (USD)": costs,
+        "Profit (USD)": revenue - costs,
+        "Standalone Profit (USD)": standalone_profit,
+        "Pooling Gain (USD)": revenue - costs - standalone_profit,
+        "Payback Period (Years)": _payback(investment, revenue[:, 0] - costs[:, 0]),
+        "Standalone Payback Period (Years)": _payback(v["total_investment"], standalone_profit[:, 0]),
+        "Electricity Revenue (USD)": daily(electricity_revenue) * revenue_growth,
+        "Electricity Purchase Cost (USD)": daily(electricity_cost) * cost_growth,
+        "Purchased Feed Cost (USD)": daily(feed_cost) * cost_growth,
+        "Manure Transport Cost (USD)": daily(transport_cost) * cost_growth
+    }
+    quantities = [manure_kg, produced.sum(axis=-1), consumed.sum(axis=-1), supplied.sum(axis=-1), received.sum(axis=-1),
+                  exported.sum(axis=-1), imported.sum(axis=-1), silage_supplied, silage_received, purchased_feed_kg]
+    farm_results.update(zip(QUANTITIES, quantities))
+
+    portfolio = {key: values.sum(axis=0) for key, values in farm_results.items() if key != "Product" and "Payback" not in key}
+    portfolio["Farms"] = len(farms)
+    portfolio["Payback Period (Years)"] = _payback(investment.sum(), portfolio["Profit (USD)"][0])
+    portfolio["Standalone Payback Period (Years)"] = _payback(v["total_investment"].sum(), portfolio["Standalone Profit (USD)"][0])
+
+    results = {"Years": list(range(1, years + 1)), "Farms": farm_results, "Portfolio": portfolio}
+    if return_daily:
+        results["Daily"] = {
+            "Electricity Produced (kWh/day)": produced.sum(axis=0),
+            "Electricity Consumed (kWh/day)": consumed.sum(axis=0),
+            "Electricity Netted (kWh/day)": supplied.sum(axis=0),
+            "Electricity Exported (kWh/day)": exported.sum(axis=0),
+            "Electricity Imported (kWh/day)": imported.sum(axis=0)
+        }
+    return results
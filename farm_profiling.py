@@ -0,0 +1,30 @@
+import time
+
+
+class PhaseTimer:
+    """Lap timer splitting one run of a script into named phases.
+
+    ``lap(name)`` charges the time since the previous lap to ``name``; repeated names accumulate,
+    so interleaved sections (e.g. several chart renders) add up to one phase.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self.started = self._last = clock()
+        self.timings = {}
+
+    def lap(self, name):
+        now = self._clock()
+        self.timings[name] = self.timings.get(name, 0.0) + (now - self._last)
+        self._last = now
+
+    def skip(self):
+        """Start a new lap without charging the elapsed time, e.g. to a nested section that keeps its own timer."""
+        self._last = self._clock()
+
+
+def phase_rows(timings):
+    """``{phase: seconds}`` as ``{"Phase", "Time (ms)", "Share"}`` rows in the order the phases first ran."""
+    total = sum(timings.values())
+    return [{"Phase": name, "Time (ms)": seconds * 1000, "Share": seconds / total if total else 0.0}
+            for name, seconds in timings.items()]
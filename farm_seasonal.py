@@ -0,0 +1,134 @@
+import numpy as np
+
+from farm_model import COST_GROWTH, REVENUE_GROWTH, calculate_farm_metrics_batch, land_feed_balance, resolve_constants
+
+DAYS_PER_YEAR = 365
+
+# (amplitude, peak day of year) for each seasonal profile. A profile is 1 + amplitude * cos(...),
+# so over a whole year it averages 1 and the annual totals of the averaged model are preserved.
+SEASONAL_PROFILES = {
+    "milk_yield": (0.08, 100),  # spring flush after calving
+    "manure": (0.10, 15),  # herd housed in winter, so more manure reaches the digester
+    "greenhouse_electricity": (0.40, 15),  # winter heating and supplementary lighting
+    "crop_yield": (0.30, 172),  # follows daylight
+    "pasture_growth": (0.90, 135)  # spring/summer grass growth, little winter grazing
+}
+
+
+def seasonal_profile(amplitude, peak_day, days=DAYS_PER_YEAR):
+    """Daily multiplier over ``days`` consecutive days starting on 1 January."""
+    day = np.arange(days) % DAYS_PER_YEAR
+    return np.maximum(0, 1 + amplitude * np.cos(2 * np.pi * (day - peak_day) / DAYS_PER_YEAR))
+
+
+def _apply_storage(net_kwh, capacity_kwh, efficiency):
+    # Battery state depends on yesterday, so step through days; every step is vectorized over scenarios.
+    # Stored energy has no value at the end of the horizon, so the battery only takes what later shortfalls will draw.
+    capacity_kwh = np.broadcast_to(capacity_kwh, net_kwh.shape[:-1])
+    deficits = np.maximum(-net_kwh, 0)
+    later_deficit = np.maximum(0, deficits.sum(axis=-1, keepdims=True) - np.cumsum(deficits, axis=-1))
+    state = np.zeros(net_kwh.shape[:-1])
+    surplus = np.empty_like(net_kwh)
+    shortfall = np.empty_like(net_kwh)
+    stored = np.empty_like(net_kwh)
+    for day in range(net_kwh.shape[-1]):
+        excess = np.maximum(net_kwh[..., day], 0)
+        deficit = deficits[..., day]
+        charge = np.clip(np.minimum(capacity_kwh, later_deficit[..., day]) - state, 0, excess * efficiency)
+        discharge = np.minimum(deficit, state)
+        state = state + charge - discharge
+        surplus[..., day] = np.maximum(0, excess - charge / efficiency)
+        shortfall[..., day] = np.maximum(0, deficit - discharge)
+        stored[..., day] = state
+    return surplus, shortfall, stored
+
+
+def _annual(daily, years):
+    return daily.reshape(*daily.shape[:-1], years, DAYS_PER_YEAR).sum(axis=-1)
+
+
+def simulate_seasonal(cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk=100, pct_cheese=0, pct_cream=0, years=5,
+                      profiles=None, storage_kwh=0.0, storage_efficiency=0.9, return_daily=False, **constants):
+    """Step the farm through ``years`` x 365 days with seasonal milk, manure, greenhouse demand, crop and pasture.
+
+    Parameters broadcast like ``calculate_farm_metrics_batch``; daily arrays have shape (scenarios..., days)
+    and are computed for all days at once. Electricity is netted per day, so a summer surplus no longer hides
+    a winter shortfall; optional on-site storage (``storage_kwh`` capacity, charged at ``storage_efficiency``)
+    carries surplus forward to later shortfalls. It is only charged with energy a later shortfall will draw, and
+    only when the purchase it saves is worth more than the exports it uses, so it never lowers total profit. Grazing cannot be stored, but feed-crop silage can, so each year's purchased feed is
+    the pasture deficit left after that year's silage. Revenues and costs grow as in the 5-year projections.
+    """
+    c = resolve_constants(constants)
+    profiles = {**SEASONAL_PROFILES, **(profiles or {})}
+    days = years * DAYS_PER_YEAR
+    milk, manure, greenhouse_demand, crop, pasture = (
+        seasonal_profile(*profiles[name], days)
+        for name in ["milk_yield", "manure", "greenhouse_electricity", "crop_yield", "pasture_growth"])
+
+    batch = calculate_farm_metrics_batch(cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk, pct_cheese, pct_cream, **c)
+    shape = batch["Profit (USD)"].shape
+    products = batch["Daily Products"]
+
+    def column(values):
+        return np.broadcast_to(np.asarray(values, dtype=float), shape)[..., np.newaxis]
+
+    # Electricity, netted day by day
+    cows_arr = np.asarray(cows, dtype=float)
+    greenhouse_arr = np.asarray(greenhouse_ha, dtype=float)
+    farm_need = column(cows_arr * c["farm_elec_per_cow_kwh_year"] / 365)
+    greenhouse_need = column(greenhouse_arr * c["gh_elec_per_ha_kwh_year"] / 365)
+    produced = column(products["Electricity Produced (kWh/day)"]) * manure
+    consumed = farm_need + greenhouse_need * greenhouse_demand
+    net = produced - consumed
+    # A stored kWh replaces a purchase but gives up 1 / efficiency kWh of exports, so it must be worth more than that
+    storage_kwh = np.where(c["electricity_purchase_price_usd"] * storage_efficiency > c["electricity_sell_price_usd"], storage_kwh, 0.0)
+    if np.any(storage_kwh > 0):
+        surplus, shortfall, stored = _apply_storage(net, storage_kwh, storage_efficiency)
+    else:
+        surplus, shortfall, stored = np.maximum(0, net), np.maximum(0, -net), np.zeros_like(net)
+
+    # Feed: pasture is grazed as it grows, silage from the feed crop covers the rest of the year
+    land = land_feed_balance(cows_arr, np.asarray(deeded_ha, dtype=float), np.asarray(grassland_ha, dtype=float), greenhouse_arr,
+                             c["feed_dm_per_cow_kg"], c["grassland_yield_kg_ha"], c["feed_crop_yield_kg_ha"])
+    pasture_deficit = np.maximum(0, column(land["feed_needed_kg"]) / 365 - column(land["pasture_feed_kg"]) / 365 * pasture)
+    purchased_feed_kg = np.maximum(0, _annual(pasture_deficit, years) - column(land["crop_feed_kg"]))
+
+    dairy_revenue = _annual(column(products["Dairy (USD/day)"]) * milk, years)
+    product_revenue = _annual(column(products["Product (USD/day)"]) * crop, years)
+    surplus_year = _annual(surplus, years)
+    shortfall_year = _annual(shortfall, years)
+    electricity_revenue = surplus_year * column(c["electricity_sell_price_usd"])
+    electricity_cost = shortfall_year * column(c["electricity_purchase_price_usd"])
+    feed_cost = purchased_feed_kg * column(c["purchased_feed_cost_usd"])
+    fixed_costs = column(batch["Operating Costs (USD)"] - batch["Purchased Feed Cost Year"] - batch["Electricity Purchase Cost Year"])
+
+    year_index = np.arange(years)
+    revenue = (dairy_revenue + product_revenue + electricity_revenue) * (1 + REVENUE_GROWTH) ** year_index
+    costs = (fixed_costs + feed_cost + electricity_cost) * (1 + COST_GROWTH) ** year_index
+
+    results = {
+        "Years": list(range(1, years + 1)),
+        "Revenue (USD)": revenue,
+        "Operating Costs (USD)": costs,
+        "Profit (USD)": revenue - costs,
+        "Dairy Revenue (USD)": dairy_revenue,
+        "Product Revenue (USD)": product_revenue,
+        "Electricity Revenue (USD)": electricity_revenue,
+        "Electricity Purchase Cost (USD)": electricity_cost,
+        "Purchased Feed Kg": purchased_feed_kg,
+        "Purchased Feed Cost (USD)": feed_cost,
+        "Electricity Produced (kWh)": _annual(produced, years),
+        "Electricity Consumed (kWh)": _annual(consumed, years),
+        "Surplus Electricity (kWh)": surplus_year,
+        "Shortfall Electricity (kWh)": shortfall_year
+    }
+    if return_daily:
+        results["Daily"] = {
+            "Electricity Produced (kWh/day)": produced,
+            "Electricity Consumed (kWh/day)": consumed,
+            "Surplus Electricity (kWh/day)": surplus,
+            "Shortfall Electricity (kWh/day)": shortfall,
+            "Stored Electricity (kWh)": stored,
+            "Pasture Deficit (kg DM/day)": pasture_deficit
+        }
+    return results
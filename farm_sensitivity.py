@@ -0,0 +1,116 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from farm_model import calculate_farm_metrics_batch, constant_ranges, default_constants
+from farm_montecarlo import transform_uniforms
+
+SENSITIVITY_METRICS = ["Profit (USD)", "Payback Period (Years)"]
+
+
+def tornado(cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk=100, pct_cheese=0, pct_cream=0, product="Tomato",
+            base=None, sort_by="Profit (USD)"):
+    """One-at-a-time sensitivity of profit and payback to every editable constant.
+
+    Each constant is moved to its Low and then its High value while the others stay at ``base``
+    (Mid values by default). All 2 * constants + 1 scenarios are evaluated as a single batch.
+    Rows are returned largest swing in ``sort_by`` first.
+    """
+    ranges = constant_ranges(product)
+    base = {**default_constants(product), **(base or {})}
+    names = list(ranges)
+    n = 2 * len(names) + 1
+
+    # Row 0 is the baseline, rows 2i+1 / 2i+2 put constant i at Low / High
+    columns = {name: np.full(n, float(base[name])) for name in names}
+    for i, name in enumerate(names):
+        low, mid, high = ranges[name]
+        columns[name][2 * i + 1] = low
+        columns[name][2 * i + 2] = high
+    batch = calculate_farm_metrics_batch(cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk, pct_cheese, pct_cream, **columns)
+
+    rows = []
+    for i, name in enumerate(names):
+        low, mid, high = ranges[name]
+        row = {"Constant": name, "Base Value": float(base[name]), "Low": low, "High": high}
+        for metric in SENSITIVITY_METRICS:
+            values = batch[metric]
+            row[f"{metric} at Base"] = float(values[0])
+            row[f"{metric} at Low"] = float(values[2 * i + 1])
+            row[f"{metric} at High"] = float(values[2 * i + 2])
+            with np.errstate(invalid="ignore"):
+                swing = abs(values[2 * i + 2] - values[2 * i + 1])
+            # Both ends unprofitable means the payback does not move at all
+            row[f"{metric} Swing"] = float(swing) if not np.isnan(swing) else 0.0
+        rows.append(row)
+    rows.sort(key=lambda row: row[f"{sort_by} Swing"], reverse=True)
+    return rows
+
+
+def _evaluate_uniforms(design, product, names, u, distribution, distributions, fixed, metric, payback_cap):
+    # Module-level so it can be shipped to worker processes
+    sampled = transform_uniforms(u, names, constant_ranges(product), distribution, distributions)
+    batch = calculate_farm_metrics_batch(*design, **fixed, **sampled)
+    values = batch[metric]
+    if metric == "Payback Period (Years)":
+        values = np.minimum(values, payback_cap)
+    return values
+
+
+def sobol_indices(cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk=100, pct_cheese=0, pct_cream=0, product="Tomato",
+                  metric="Profit (USD)", n_base=4096, seed=None, distribution="triangular", distributions=None, fixed=None,
+                  workers=None, executor=None, chunk_size=50_000, payback_cap=100.0):
+    """First-order and total Sobol indices for every sampled constant.
+
+    Uses the Saltelli (2010) first-order and Jansen total-effect estimators, which need
+    ``n_base * (constants + 2)`` model evaluations. Those are split into ``chunk_size`` blocks and
+    spread over ``executor`` (or a new pool of ``workers`` processes; ``workers=1`` stays in-process).
+    Infinite paybacks are capped at ``payback_cap`` years so the variance stays finite.
+    """
+    fixed = dict(fixed or {})
+    names = [name for name in constant_ranges(product) if name not in fixed]
+    k = len(names)
+    rng = np.random.default_rng(seed)
+    a = rng.random((n_base, k))
+    b = rng.random((n_base, k))
+
+    # Stack A, B and every AB_i (A with column i taken from B) into one design matrix
+    blocks = [a, b]
+    for i in range(k):
+        ab = a.copy()
+        ab[:, i] = b[:, i]
+        blocks.append(ab)
+    u = np.vstack(blocks)
+
+    design = (cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk, pct_cheese, pct_cream)
+    chunks = [u[start:start + chunk_size] for start in range(0, len(u), chunk_size)]
+    args = (design, product, names)
+    options = (distribution, distributions, fixed, metric, payback_cap)
+    workers = workers or os.cpu_count() or 1
+    if executor is None and (workers == 1 or len(chunks) == 1):
+        values = [_evaluate_uniforms(*args, chunk, *options) for chunk in chunks]
+    elif executor is None:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            values = list(pool.map(_evaluate_uniforms, *zip(*[(*args, chunk, *options) for chunk in chunks])))
+    else:
+        values = list(executor.map(_evaluate_uniforms, *zip(*[(*args, chunk, *options) for chunk in chunks])))
+    f = np.concatenate(values).reshape(k + 2, n_base)
+
+    f_a, f_b, f_ab = f[0], f[1], f[2:]
+    variance = np.var(np.concatenate([f_a, f_b]))
+    if variance > 0:
+        first_order = np.mean(f_b * (f_ab - f_a), axis=1) / variance
+        total = 0.5 * np.mean((f_a - f_ab) ** 2, axis=1) / variance
+    else:
+        first_order = total = np.zeros(k)
+
+    order = np.argsort(total)[::-1]
+    return {
+        "Metric": metric,
+        "Evaluations": int(f.size),
+        "Variance": float(variance),
+        "Constant": [names[i] for i in order],
+        "S1": [float(first_order[i]) for i in order],
+        "ST": [float(total[i]) for i in order]
+    }
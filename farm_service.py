@@ -0,0 +1,343 @@
+"""JSON API over the farm model for other tools, built on asyncio streams and a process pool.
+
+    python farm_service.py --port 8000 --workers 4
+
+Endpoints:
+
+    POST /v1/farm-metrics        one scenario           -> {"results": {...}, "warning": null}
+    POST /v1/farm-metrics/bulk   {"scenarios": [...]}   -> {"scenarios": [{"results": {...}, "warning": null}, ...]}
+    GET  /healthz                liveness
+    GET  /stats                  request, batching and cache counters
+
+A scenario is a JSON object of ``calculate_farm_metrics`` arguments: ``cows``, ``deeded_ha``, ``grassland_ha`` and
+``greenhouse_ha`` are required; ``pct_milk``/``pct_cheese``/``pct_cream``, ``product`` and any editable constant
+(e.g. ``milk_price_usd``) default as in the app. Results have the structure ``calculate_farm_metrics`` returns, with
+non-finite numbers (an infinite payback) sent as null. Scenarios from concurrent requests are coalesced into one
+vectorized evaluation on the pool, and responses are cached per scenario.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+from farm_cache import ResultCache
+from farm_model import MODEL_INPUTS, PRODUCT_RANGES, calculate_scenarios, default_constants
+
+REQUIRED_INPUTS = ["cows", "deeded_ha", "grassland_ha", "greenhouse_ha"]
+ALLOCATION_DEFAULTS = {"pct_milk": 100, "pct_cheese": 0, "pct_cream": 0}
+MAX_BODY_BYTES = 16 * 2**20
+MAX_BULK_SCENARIOS = 100_000
+
+
+class RequestError(Exception):
+    """Client error reported as a JSON ``{"error": ...}`` body with ``status``."""
+
+    def __init__(self, message, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_scenario(spec):
+    """Validate one scenario object and fill in every default in ``MODEL_INPUTS`` order, so equal scenarios share a cache key."""
+    if not isinstance(spec, dict):
+        raise RequestError("A scenario must be a JSON object")
+    unknown = set(spec) - set(MODEL_INPUTS) - {"product"}
+    if unknown:
+        raise RequestError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    missing = [name for name in REQUIRED_INPUTS if name not in spec]
+    if missing:
+        raise RequestError(f"Missing parameters: {', '.join(missing)}")
+    product = spec.get("product", "Tomato")
+    if not isinstance(product, str) or product not in PRODUCT_RANGES:
+        raise RequestError(f"Unknown product '{product}'; expected one of {', '.join(PRODUCT_RANGES)}")
+
+    values = {**ALLOCATION_DEFAULTS, **default_constants(product), **spec}
+    scenario = {"product": product}
+    for name in MODEL_INPUTS:
+        value = values[name]
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise RequestError(f"'{name}' must be a finite number")
+        try:
+            # JSON integers are unbounded, so one written out with 400 digits overflows a float
+            value = float(value)
+        except OverflowError:
+            value = math.inf
+        if not math.isfinite(value):
+            raise RequestError(f"'{name}' must be a finite number")
+        scenario[name] = value
+    if scenario["pct_milk"] + scenario["pct_cheese"] + scenario["pct_cream"] != 100:
+        raise RequestError("Allocations must sum to 100%.")
+    return scenario
+
+
+def _finite_or_none(value):
+    if isinstance(value, dict):
+        return {key: _finite_or_none(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_finite_or_none(item) for item in value]
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _to_json(results, warning):
+    # Most responses are all finite, so only the rare ones JSON rejects are walked to replace inf/nan with null
+    response = {"results": results, "warning": warning}
+    try:
+        return json.dumps(response, allow_nan=False)
+    except ValueError:
+        return json.dumps(_finite_or_none(response), allow_nan=False)
+
+
+def _evaluate(scenarios):
+    # Runs in a worker process and returns one JSON document per scenario, so the event loop only joins strings
+    return [_to_json(results, warning) for results, warning in calculate_scenarios(scenarios)]
+
+
+class ScenarioBatcher:
+    """Coalesces the scenarios of concurrent requests into one vectorized evaluation on ``executor``.
+
+    A batch is dispatched once ``max_batch`` scenarios are queued or ``max_delay`` seconds after its first
+    request, whichever comes first. At most ``max_in_flight`` batches run at once; later ones keep growing
+    in the queue meanwhile, so batches get larger as load rises.
+    """
+
+    def __init__(self, executor, max_batch=4096, max_delay=0.002, max_in_flight=2):
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_in_flight = max_in_flight
+        self.batches = 0
+        self.scenarios = 0
+        self._queue = None
+        self._slots = None
+        self._runner = None
+        self._tasks = set()
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._runner = asyncio.create_task(self._run())
+
+    async def close(self):
+        self._runner.cancel()
+        await asyncio.gather(self._runner, *self._tasks, return_exceptions=True)
+
+    async def evaluate(self, scenarios):
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((scenarios, future))
+        return await future
+
+    def _drain(self, pending, size):
+        while size < self.max_batch and not self._queue.empty():
+            item = self._queue.get_nowait()
+            pending.append(item)
+            size += len(item[0])
+        return size
+
+    async def _run(self):
+        while True:
+            pending = [await self._queue.get()]
+            size = self._drain(pending, len(pending[0][0]))
+            if size < self.max_batch and self.max_delay > 0:
+                await asyncio.sleep(self.max_delay)
+                size = self._drain(pending, size)
+            await self._slots.acquire()
+            size = self._drain(pending, size)
+            task = asyncio.create_task(self._dispatch(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, pending):
+        try:
+            scenarios = [scenario for batch, _ in pending for scenario in batch]
+            self.batches += 1
+            self.scenarios += len(scenarios)
+            try:
+                responses = await asyncio.get_running_loop().run_in_executor(self.executor, _evaluate, scenarios)
+            except Exception as error:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(error)
+                return
+            start = 0
+            for batch, future in pending:
+                if not future.done():
+                    future.set_result(responses[start:start + len(batch)])
+                start += len(batch)
+        finally:
+            self._slots.release()
+
+
+class FarmService:
+    """Request handling, response cache and counters; ``serve_connection`` speaks HTTP/1.1 with keep-alive."""
+
+    def __init__(self, executor, cache_size=100_000, cache_ttl=3600.0, max_batch=4096, max_delay=0.002, max_in_flight=2):
+        self.cache = ResultCache(maxsize=cache_size, ttl=cache_ttl)
+        self.batcher = ScenarioBatcher(executor, max_batch=max_batch, max_delay=max_delay, max_in_flight=max_in_flight)
+        self.started = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+
+    async def evaluate(self, scenarios):
+        """JSON responses for already-parsed scenarios; only cache misses go to the batcher."""
+        keys = [tuple(scenario.values()) for scenario in scenarios]
+        responses = [None] * len(scenarios)
+        misses = []
+        for i, key in enumerate(keys):
+            hit, response = self.cache.get(key)
+            if hit:
+                responses[i] = response
+            else:
+                misses.append(i)
+        if misses:
+            computed = await self.batcher.evaluate([scenarios[i] for i in misses])
+            for i, response in zip(misses, computed):
+                self.cache.put(keys[i], response)
+                responses[i] = response
+        return responses
+
+    def stats(self):
+        batches = self.batcher.batches
+        return {
+            "Uptime (s)": time.monotonic() - self.started,
+            "Requests": self.requests,
+            "Errors": self.errors,
+            "Batches": batches,
+            "Evaluated Scenarios": self.batcher.scenarios,
+            "Mean Batch Size": self.batcher.scenarios / batches if batches else 0.0,
+            "Cache": self.cache.stats()
+        }
+
+    async def handle(self, method, path, body):
+        """Return ``(status, JSON text)`` for one request."""
+        routes = {
+            "/healthz": ("GET", None),
+            "/stats": ("GET", None),
+            "/v1/farm-metrics": ("POST", False),
+            "/v1/farm-metrics/bulk": ("POST", True)
+        }
+        if path not in routes:
+            raise RequestError(f"No such endpoint: {path}", HTTPStatus.NOT_FOUND)
+        allowed, bulk = routes[path]
+        if method != allowed:
+            raise RequestError(f"{path} only accepts {allowed}", HTTPStatus.METHOD_NOT_ALLOWED)
+        if path == "/healthz":
+            return HTTPStatus.OK, json.dumps({"status": "ok"})
+        if path == "/stats":
+            return HTTPStatus.OK, json.dumps(self.stats())
+
+        try:
+            spec = json.loads(body)
+        except ValueError as error:
+            raise RequestError(f"Invalid JSON: {error}")
+        if not bulk:
+            return HTTPStatus.OK, (await self.evaluate([parse_scenario(spec)]))[0]
+        if not isinstance(spec, dict) or not isinstance(spec.get("scenarios"), list):
+            raise RequestError('Expected {"scenarios": [...]}')
+        if len(spec["scenarios"]) > MAX_BULK_SCENARIOS:
+            raise RequestError(f"At most {MAX_BULK_SCENARIOS:,} scenarios per request", HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        scenarios = []
+        for i, item in enumerate(spec["scenarios"]):
+            try:
+                scenarios.append(parse_scenario(item))
+            except RequestError as error:
+                raise RequestError(f"scenarios[{i}]: {error}")
+        return HTTPStatus.OK, '{"scenarios": [' + ", ".join(await self.evaluate(scenarios)) + "]}"
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = False
+                self.requests += 1
+                try:
+                    parts = request_line.decode("latin-1").split()
+                    if len(parts) != 3:
+                        raise RequestError("Malformed request line")
+                    method, target, version = parts
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                    try:
+                        length = int(headers.get("content-length", 0))
+                    except ValueError:
+                        keep_alive = False
+                        raise RequestError("Invalid Content-Length")
+                    if length > MAX_BODY_BYTES:
+                        keep_alive = False
+                        raise RequestError(f"Body larger than {MAX_BODY_BYTES:,} bytes", HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+                    body = await reader.readexactly(length) if length > 0 else b""
+                    status, payload = await self.handle(method, target.split("?", 1)[0], body)
+                except RequestError as error:
+                    self.errors += 1
+                    status, payload = error.status, json.dumps({"error": str(error)})
+                except Exception as error:
+                    # Unexpected failures (e.g. a crashed worker) still get a JSON reply
+                    self.errors += 1
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, json.dumps({"error": f"{type(error).__name__}: {error}"})
+
+                content = payload.encode()
+                writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(content)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                             + content)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host="127.0.0.1", port=8000, workers=1, ready=None, **options):
+    """Run the service until cancelled; ``ready`` (an ``asyncio.Event``) is set once it accepts connections."""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        service = FarmService(executor, **options)
+        service.batcher.start()
+        # Start the workers before the first request arrives
+        await asyncio.gather(*[asyncio.get_running_loop().run_in_executor(executor, _evaluate, []) for _ in range(workers)])
+        server = await asyncio.start_server(service.serve_connection, host, port)
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await service.batcher.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the farm model as a JSON API.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes; 0 uses every CPU (default: 1)")
+    parser.add_argument("--max-batch", type=int, default=4096, help="Most scenarios per vectorized evaluation (default: 4096)")
+    parser.add_argument("--max-delay-ms", type=float, default=2.0, help="How long a batch waits for more requests (default: 2)")
+    parser.add_argument("--cache-size", type=int, default=100_000, help="Cached scenario responses (default: 100000)")
+    parser.add_argument("--cache-ttl", type=float, default=3600.0, help="Seconds a cached response stays valid (default: 3600)")
+    args = parser.parse_args(argv)
+
+    workers = args.workers or os.cpu_count() or 1
+    print(f"Serving the farm model on http://{args.host}:{args.port} with {workers} worker(s)")
+    try:
+        asyncio.run(serve(args.host, args.port, workers, max_batch=args.max_batch, max_delay=args.max_delay_ms / 1000,
+                          max_in_flight=workers + 1, cache_size=args.cache_size, cache_ttl=args.cache_ttl))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
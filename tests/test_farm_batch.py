@@ -0,0 +1,35 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from farm_batch import run_batch
+
+
+def test_text_columns_empty_in_first_chunk(tmp_path):
+    pd.DataFrame({
+        "cows": [100, None, 120, 80],
+        "deeded_ha": [51] * 4,
+        "grassland_ha": [35] * 4,
+        "greenhouse_ha": [1.5] * 4,
+        "product": [None, None, "Lettuce", "Tomato"],
+        "note": [None, None, "north", "south"]
+    }).to_csv(tmp_path / "scenarios.csv", index=False)
+
+    assert run_batch(tmp_path / "scenarios.csv", tmp_path / "results.parquet", chunk_size=2) == 4
+    table = pq.read_table(tmp_path / "results.parquet")
+    assert table.schema.field("product").type == pa.string()
+    assert table.column("product").to_pylist() == [None, None, "Lettuce", "Tomato"]
+    assert table.column("note").to_pylist() == [None, None, "north", "south"]
+
+
+def test_passthrough_columns_keep_their_types(tmp_path):
+    # Blank ids in the first chunk must not turn the ids into floats or text
+    (tmp_path / "scenarios.csv").write_text("id,weight,flag,cows\n,1,True,100\n,2,False,110\n3,2.5,,120\n4,,True,80\n")
+
+    run_batch(tmp_path / "scenarios.csv", tmp_path / "results.parquet", chunk_size=2)
+    table = pq.read_table(tmp_path / "results.parquet")
+    assert table.schema.field("id").type == pa.int64()
+    assert table.column("id").to_pylist() == [None, None, 3, 4]
+    assert table.schema.field("weight").type == pa.float64()
+    assert table.schema.field("flag").type == pa.bool_()
+    assert table.column("flag").to_pylist() == [True, False, None, True]
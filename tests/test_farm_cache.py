@@ -0,0 +1,52 @@
+import numpy as np
+
+from farm_cache import ResultCache, parameter_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == (True, 1)
+    cache.put("c", 3)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+    assert cache.stats()["Evictions"] == 1
+
+
+def test_entries_expire_after_the_ttl():
+    clock = FakeClock()
+    cache = ResultCache(ttl=10, clock=clock)
+    calls = []
+    assert cache.get_or_compute("a", lambda: calls.append(1) or len(calls)) == 1
+    clock.now = 10
+    assert cache.get_or_compute("a", lambda: calls.append(1) or len(calls)) == 1
+    clock.now = 10.5
+    assert cache.get_or_compute("a", lambda: calls.append(1) or len(calls)) == 2
+    stats = cache.stats()
+    assert (stats["Hits"], stats["Misses"], stats["Expired"]) == (1, 2, 1)
+
+
+def test_equivalent_parameters_share_a_key():
+    key = parameter_key(100, product="Tomato", constants={"a": 1, "b": 2.5})
+    assert parameter_key(100.0, product="Tomato", constants={"b": 2.5, "a": 1.0}) == key
+    assert parameter_key(np.float64(100), constants={"a": np.int64(1), "b": 2.5}, product="Tomato") == key
+    assert parameter_key(101, product="Tomato", constants={"a": 1, "b": 2.5}) != key
+
+
+def test_large_arrays_differing_in_the_middle_get_different_keys():
+    values = np.zeros(10_000)
+    changed = values.copy()
+    changed[5_000] = 1
+    assert repr(values) == repr(changed)
+    assert parameter_key(values) != parameter_key(changed)
+    assert parameter_key(values) == parameter_key(values.copy())
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from farm_cashflow import internal_rate_of_return, payback_period, project_cash_flows
+from farm_model import model_values
+
+
+def test_irr_of_an_annuity():
+    assert internal_rate_of_return([-100] + [30] * 5) == pytest.approx(0.152382, abs=1e-6)
+
+
+def test_irr_returns_the_highest_of_several_roots():
+    # NPV * (1 + r) ** 3 = (y - 1.1)(y - 1.2)(y - 1.5) with y = 1 + r, so the IRRs are 10%, 20% and 50%
+    flows = np.poly([1.1, 1.2, 1.5])
+    assert internal_rate_of_return(flows) == pytest.approx(0.5, abs=1e-8)
+    assert np.isnan(internal_rate_of_return([100, 10, 10]))
+
+
+def test_irr_is_vectorized_over_scenarios():
+    flows = np.array([[-100] + [30] * 5, [-100] + [20] * 5, [-100] + [10] * 5])
+    expected = [internal_rate_of_return(row) for row in flows]
+    assert internal_rate_of_return(flows) == pytest.approx(expected)
+
+
+def test_payback_period():
+    assert payback_period([-100, 30, 30, 30, 30, 30]) == pytest.approx(100 / 30)
+    assert payback_period([-100, 50, 50]) == 2
+    assert payback_period([-100, 10, 10, 10]) == np.inf
+    # The first time the cumulative flow turns non-negative counts, even if it dips again later
+    assert payback_period([-100, 150, -200, 10]) == pytest.approx(100 / 150)
+
+
+def test_replacements_are_not_bought_in_the_final_year():
+    values = model_values(100, 51, 35, 1.5)
+    # Equipment every 10 years, bioenergy every 12 and the greenhouse every 15; year 24 is the last one
+    capex = project_cash_flows(values, years=24)["Capital Expenditure (USD)"]
+    assert np.flatnonzero(capex).tolist() == [0, 10, 12, 15, 20]
+    assert capex[12] == pytest.approx(values["cost_bioenergy"] * 1.03 ** 12)
+    assert project_cash_flows(values, years=25)["Capital Expenditure (USD)"][24] > 0
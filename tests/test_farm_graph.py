@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from farm_graph import FarmGraph
+from farm_model import calculate_farm_metrics_batch
+
+ALL_NODES = ["land_feed", "investment", "operating_costs", "dairy", "greenhouse", "biogas", "energy_balance",
+             "financials", "projections", "report"]
+
+# Each step: parameters to change and the nodes that must rerun
+UPDATES = [
+    ({"milk_price_usd": 0.55}, ["dairy", "financials", "projections", "report"]),
+    ({"milk_price_usd": 0.55}, []),
+    ({"product_price_usd": 2.0, "yield_tons_ha": 300}, ["greenhouse", "financials", "projections", "report"]),
+    ({"electricity_sell_price_usd": 0.2}, ["energy_balance", "financials", "projections", "report"]),
+    ({"usd_to_try": 35}, ["report"]),
+    ({"cows": np.array([60, 100, 250])}, ["land_feed", "investment", "operating_costs", "dairy", "biogas", "energy_balance",
+                                          "financials", "projections", "report"]),
+    ({"greenhouse_ha": 3.0, "pct_milk": 50, "pct_cheese": 50}, [n for n in ALL_NODES if n != "biogas"]),
+    ({"purchased_feed_cost_usd": 0.4}, ["operating_costs", "financials", "projections", "report"])
+]
+
+
+def assert_same_results(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, dict):
+            assert_same_results(actual[key], value)
+        elif isinstance(value, list):
+            assert actual[key] == value
+        else:
+            assert np.array_equal(actual[key], value)
+
+
+def test_updates_rerun_only_downstream_nodes_and_match_the_batch_model():
+    graph = FarmGraph()
+    params = {"cows": 100, "deeded_ha": 51, "grassland_ha": 35, "greenhouse_ha": 1.5}
+    assert_same_results(graph.evaluate(), calculate_farm_metrics_batch(**params))
+    assert graph.trace == ALL_NODES
+
+    for change, rerun in UPDATES:
+        graph.update(**change)
+        params.update(change)
+        assert_same_results(graph.evaluate(), calculate_farm_metrics_batch(**params))
+        assert graph.trace == rerun
+
+    counts = {name: 1 + sum(name in rerun for _, rerun in UPDATES) for name in ALL_NODES}
+    assert graph.run_counts == counts
+    assert graph.run_counts["biogas"] == 2
+
+
+def test_unknown_parameters_are_rejected():
+    with pytest.raises(TypeError, match="milk_prise"):
+        FarmGraph().update(milk_prise=1)
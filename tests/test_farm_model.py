@@ -0,0 +1,150 @@
+"""Parity of the vectorized farm model with the original scalar formulas of the app."""
+import random
+
+import numpy as np
+import pytest
+
+from farm_model import PRODUCT_OPTIONS, calculate_farm_metrics, calculate_farm_metrics_batch, constant_ranges, scenario_results
+
+
+def reference_farm_metrics(cows, deeded_ha, grassland_ha, greenhouse_ha, pct_milk, pct_cheese, pct_cream, product, c):
+    """The scalar model as it was written in the app before the vectorized engine, kept verbatim for comparison."""
+    pasture_ha = min(grassland_ha, cows * (c["feed_dm_per_cow_kg"] / 2) / c["grassland_yield_kg_ha"])
+    buildings_ha = 1
+    feed_crop_ha = max(0, deeded_ha - pasture_ha - greenhouse_ha - buildings_ha)
+
+    feed_needed_kg = cows * c["feed_dm_per_cow_kg"]
+    pasture_feed_kg = pasture_ha * c["grassland_yield_kg_ha"]
+    required_feed_crop_ha = max(0, (feed_needed_kg - pasture_feed_kg) / c["feed_crop_yield_kg_ha"])
+    total_required_ha = pasture_ha + greenhouse_ha + buildings_ha + required_feed_crop_ha
+    warning = f"Warning: For full feed self-sufficiency, need {total_required_ha:.1f} ha (using purchased feed instead)." if total_required_ha > deeded_ha else None
+
+    crop_feed_kg = feed_crop_ha * c["feed_crop_yield_kg_ha"]
+    total_feed_kg = pasture_feed_kg + crop_feed_kg
+    purchased_feed_kg = max(0, feed_needed_kg - total_feed_kg)
+
+    cost_cows = cows * 3000.0
+    cost_greenhouse = greenhouse_ha * c["greenhouse_cost_per_ha"]
+    cost_infrastructure = 80000.0 * (cows / 60)
+    cost_bioenergy = 50000.0 * (cows / 60)
+    cost_equipment = 30000.0 * (cows / 60)
+    cost_supplies = 10000.0 * (cows / 60)
+    total_investment = cost_cows + cost_greenhouse + cost_infrastructure + cost_bioenergy + cost_equipment + cost_supplies
+
+    cost_feed = purchased_feed_kg * c["purchased_feed_cost_usd"]
+    cost_labor = 36000.0 * (cows / 60 + greenhouse_ha / 1.5)
+    cost_vet = cows * 50.0
+    cost_utilities = 5000.0 * (cows / 60)
+    cost_marketing = 3000.0 * (cows / 60)
+    cost_greenhouse_ops = 10000.0 * (greenhouse_ha / 1.5)
+    cost_maintenance = 5000.0 * (cows / 60)
+
+    milk_liters_day = cows * c["milk_yield_liters"]
+    raw_milk_liters_day = milk_liters_day * (pct_milk / 100)
+    cheese_kg_day = (milk_liters_day * (pct_cheese / 100)) * 0.1
+    cream_kg_day = (milk_liters_day * (pct_cream / 100)) * 0.04
+    dairy_revenue_day = raw_milk_liters_day * c["milk_price_usd"] + cheese_kg_day * c["cheese_price_usd"] + cream_kg_day * c["cream_price_usd"]
+    dairy_revenue_year = dairy_revenue_day * 365
+
+    product_kg_day = greenhouse_ha * c["yield_tons_ha"] * 1000 / 365
+    product_revenue_day = product_kg_day * c["product_price_usd"]
+    product_revenue_year = product_revenue_day * 365
+
+    manure_kg_day = cows * c["manure_per_cow_kg"]
+    vs_kg_day = manure_kg_day * c["vs_fraction"]
+    biogas_m3_day = vs_kg_day * c["biogas_yield_m3_kg"]
+    electricity_kwh_day = biogas_m3_day * c["energy_per_m3_kwh"] * c["electrical_efficiency"]
+    farm_electricity_need_kwh_day = (cows * c["farm_elec_per_cow_kwh_year"] / 365) + (greenhouse_ha * c["gh_elec_per_ha_kwh_year"] / 365)
+    surplus_kwh_day = max(0, electricity_kwh_day - farm_electricity_need_kwh_day)
+    shortfall_kwh_day = max(0, farm_electricity_need_kwh_day - electricity_kwh_day)
+    electricity_revenue_day = surplus_kwh_day * c["electricity_sell_price_usd"]
+    electricity_revenue_year = electricity_revenue_day * 365
+    electricity_purchase_cost_year = shortfall_kwh_day * 365 * c["electricity_purchase_price_usd"]
+    electricity_purchase_day = shortfall_kwh_day * c["electricity_purchase_price_usd"]
+
+    total_revenue_year = dairy_revenue_year + product_revenue_year + electricity_revenue_year
+    total_costs = cost_feed + cost_labor + cost_vet + cost_utilities + cost_marketing + cost_greenhouse_ops + cost_maintenance + electricity_purchase_cost_year
+
+    annual_profit = total_revenue_year - total_costs
+    payback_period = total_investment / annual_profit if annual_profit > 0 else float('inf')
+
+    years = [1, 2, 3, 4, 5]
+    revenue_projections = [total_revenue_year * (1 + 0.02) ** (year - 1) for year in years]
+    cost_projections = [total_costs * (1 + 0.03) ** (year - 1) for year in years]
+    profit_projections = [rev - cost for rev, cost in zip(revenue_projections, cost_projections)]
+
+    usd_to_try = c["usd_to_try"]
+    return {
+        "Investment (USD)": total_investment,
+        "Investment (TRY)": total_investment * usd_to_try,
+        "Operating Costs (USD)": total_costs,
+        "Operating Costs (TRY)": total_costs * usd_to_try,
+        "Revenue (USD)": total_revenue_year,
+        "Revenue (TRY)": total_revenue_year * usd_to_try,
+        "Profit (USD)": annual_profit,
+        "Profit (TRY)": annual_profit * usd_to_try,
+        "Payback Period (Years)": payback_period,
+        "Daily Costs": {
+            "Feed (USD)": cost_feed / 365,
+            "Labor (USD)": cost_labor / 365,
+            "Veterinary (USD)": cost_vet / 365,
+            "Utilities (USD)": cost_utilities / 365,
+            "Marketing (USD)": cost_marketing / 365,
+            "Greenhouse Ops (USD)": cost_greenhouse_ops / 365,
+            "Maintenance (USD)": cost_maintenance / 365,
+            "Electricity Purchase (USD)": electricity_purchase_day
+        },
+        "Daily Products": {
+            "Dairy (liters/day raw milk)": raw_milk_liters_day,
+            "Cheese (kg/day)": cheese_kg_day,
+            "Cream (kg/day)": cream_kg_day,
+            "Dairy (USD/day)": dairy_revenue_day,
+            f"{product} (kg/day)": product_kg_day,
+            f"{product} (USD/day)": product_revenue_day,
+            "Electricity Produced (kWh/day)": electricity_kwh_day,
+            "Electricity Consumed (kWh/day)": farm_electricity_need_kwh_day,
+            "Surplus Electricity (kWh/day)": surplus_kwh_day,
+            "Surplus Electricity (USD/day)": electricity_revenue_day,
+            "Shortfall Electricity (kWh/day)": shortfall_kwh_day
+        },
+        "Projections": {"Years": years, "Revenue": revenue_projections, "Costs": cost_projections, "Profit": profit_projections},
+        "Dairy Revenue Year": dairy_revenue_year,
+        "Product Revenue Year": product_revenue_year,
+        "Electricity Revenue Year": electricity_revenue_year,
+        "Purchased Feed Kg": purchased_feed_kg,
+        "Electricity Purchase Cost Year": electricity_purchase_cost_year,
+        "Shortfall Kwh Year": shortfall_kwh_day * 365,
+        "Purchased Feed Cost Year": cost_feed
+    }, warning
+
+
+def random_scenarios(n, seed=1):
+    rng = random.Random(seed)
+    scenarios = []
+    for _ in range(n):
+        product = rng.choice(PRODUCT_OPTIONS)
+        constants = {name: rng.uniform(low, high) for name, (low, mid, high) in constant_ranges(product).items()}
+        design = (rng.randrange(10, 510, 10), rng.randrange(10, 205, 5), rng.randrange(0, 205, 5), round(rng.uniform(0.01, 10), 2))
+        milk = rng.randint(0, 100)
+        cheese = rng.randint(0, 100 - milk)
+        scenarios.append((design, (milk, cheese, 100 - milk - cheese), product, constants))
+    return scenarios
+
+
+SCENARIOS = random_scenarios(1000)
+
+
+@pytest.mark.parametrize("design, allocation, product, constants", SCENARIOS[:200])
+def test_scalar_model_matches_reference_exactly(design, allocation, product, constants):
+    expected = reference_farm_metrics(*design, *allocation, product, constants)
+    assert calculate_farm_metrics(*design, *allocation, product=product, **constants) == expected
+
+
+def test_batch_model_matches_reference_exactly():
+    designs = np.array([design for design, _, _, _ in SCENARIOS], dtype=float)
+    allocations = np.array([allocation for _, allocation, _, _ in SCENARIOS], dtype=float)
+    constants = {name: np.array([c[name] for _, _, _, c in SCENARIOS]) for name in SCENARIOS[0][3]}
+    batch = calculate_farm_metrics_batch(*designs.T, *allocations.T, **constants)
+    for i, (design, allocation, product, c) in enumerate(SCENARIOS):
+        assert scenario_results(batch, i, product) == reference_farm_metrics(*design, *allocation, product, c)
+
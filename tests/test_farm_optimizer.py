@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from farm_model import BUILDINGS_HA, calculate_farm_metrics
+from farm_optimizer import optimize_design, pareto_front
+
+
+def test_pareto_front_is_not_dominated():
+    rng = np.random.default_rng(0)
+    profit = rng.normal(size=500).round(1)
+    investment = rng.normal(size=500).round(1)
+    mask = pareto_front(profit, investment)
+    # Nothing at least as good on both axes and strictly better on one may exist for a front point
+    for i in np.flatnonzero(mask):
+        dominated = (profit >= profit[i]) & (investment <= investment[i]) & ((profit > profit[i]) | (investment < investment[i]))
+        assert not dominated.any()
+    # And every other point is matched or beaten by some front point
+    for i in np.flatnonzero(~mask):
+        assert ((profit[mask] >= profit[i]) & (investment[mask] <= investment[i])).any()
+
+
+@pytest.mark.parametrize("objective", ["profit", "payback"])
+def test_optimum_satisfies_constraints_and_beats_coarse_grid(objective):
+    options = {"objective": objective, "require_feed_self_sufficiency": True, "require_no_shortfall": True}
+    best = optimize_design(51, **options)["Best"]
+    coarse = optimize_design(51, refine_iterations=0, **options)["Best"]
+
+    results, warning = calculate_farm_metrics(best["Cows"], 51, best["Grassland Area (ha)"], best["Greenhouse Area (ha)"])
+    assert best["Grassland Area (ha)"] + best["Greenhouse Area (ha)"] + BUILDINGS_HA <= 51
+    assert warning is None
+    assert results["Daily Products"]["Shortfall Electricity (kWh/day)"] == 0
+    assert results["Profit (USD)"] == best["Profit (USD)"]
+
+    if objective == "profit":
+        assert best["Profit (USD)"] >= coarse["Profit (USD)"]
+    else:
+        assert best["Payback Period (Years)"] <= coarse["Payback Period (Years)"]
+
+
+def test_pareto_front_of_optimizer_is_not_dominated():
+    front = optimize_design(51)["Pareto Front"]
+    profit = np.array([row["Profit (USD)"] for row in front])
+    investment = np.array([row["Investment (USD)"] for row in front])
+    assert pareto_front(profit, investment).all()
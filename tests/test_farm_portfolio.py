@@ -0,0 +1,17 @@
+import pytest
+
+from farm_portfolio import simulate_portfolio
+
+FARM = {"cows": 100, "deeded_ha": 51, "grassland_ha": 35, "greenhouse_ha": 1.5}
+
+
+def test_invalid_allocation_names_the_farm():
+    farms = [FARM, {**FARM, "pct_milk": 50}, {**FARM, "pct_milk": 60, "pct_cheese": 40}]
+    with pytest.raises(ValueError, match=r"farms 2\)"):
+        simulate_portfolio(farms)
+
+
+def test_no_pooling_matches_standalone():
+    farms = [FARM, {**FARM, "cows": 300, "deeded_ha": 200, "greenhouse_ha": 0.0}]
+    results = simulate_portfolio(farms, shared_digester=False, net_electricity=False, net_feed=False)
+    assert (results["Farms"]["Pooling Gain (USD)"] == 0).all()
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from farm_model import calculate_farm_metrics
+from farm_seasonal import SEASONAL_PROFILES, simulate_seasonal
+
+FLAT = {name: (0, 0) for name in SEASONAL_PROFILES}
+DESIGNS = [(100, 51, 35, 1.5), (300, 200, 100, 0.3), (300, 200, 100, 0.01), (60, 51, 35, 3)]
+
+
+@pytest.mark.parametrize("design", DESIGNS)
+def test_flat_profiles_reproduce_the_annual_model(design):
+    results = simulate_seasonal(*design, profiles=FLAT, storage_kwh=1e5)
+    metrics, _ = calculate_farm_metrics(*design)
+    assert results["Profit (USD)"] == pytest.approx(metrics["Projections"]["Profit"])
+    assert results["Purchased Feed Kg"] == pytest.approx([metrics["Purchased Feed Kg"]] * 5)
+
+
+def test_storage_never_lowers_profit():
+    # Greenhouse areas from always-surplus (0.01 ha) through seasonal shortfalls to always-short (0.8 ha)
+    greenhouse_ha = np.array([0.01, 0.1, 0.2, 0.3, 0.4, 0.6, 0.8])
+    without = simulate_seasonal(300, 200, 100, greenhouse_ha)["Profit (USD)"].sum(axis=-1)
+    for storage_kwh in [1e3, 1e4, 1e6]:
+        results = simulate_seasonal(300, 200, 100, greenhouse_ha, storage_kwh=storage_kwh, return_daily=True)
+        assert (results["Profit (USD)"].sum(axis=-1) >= without - 1e-6).all()
+        # Nothing is left stranded in the battery at the end of the horizon
+        assert results["Daily"]["Stored Electricity (kWh)"][:, -1] == pytest.approx(0, abs=1e-6)
+    assert results["Profit (USD)"].sum(axis=-1)[3] > without[3]
+
+
+def test_storage_is_not_used_when_exports_are_worth_more():
+    results = simulate_seasonal(300, 200, 100, 0.3, storage_kwh=1e4, electricity_sell_price_usd=0.14, return_daily=True)
+    assert not results["Daily"]["Stored Electricity (kWh)"].any()
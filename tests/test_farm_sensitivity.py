@@ -0,0 +1,35 @@
+import math
+
+import pytest
+
+from farm_model import default_constants
+from farm_sensitivity import sobol_indices, tornado
+
+DESIGN = (100, 51, 35, 1.5)
+
+
+def test_additive_inputs_have_equal_first_order_and_total_effects():
+    # Profit is linear in each price and they do not interact, so S1 = ST and the indices sum to one
+    sampled = ("milk_price_usd", "product_price_usd")
+    fixed = {name: value for name, value in default_constants("Tomato").items() if name not in sampled}
+    results = sobol_indices(*DESIGN, n_base=4096, seed=3, fixed=fixed, workers=1)
+    assert sorted(results["Constant"]) == sorted(sampled)
+    assert results["S1"] == pytest.approx(results["ST"], abs=0.03)
+    assert sum(results["ST"]) == pytest.approx(1, abs=0.03)
+
+
+def test_process_pool_matches_in_process_for_a_fixed_seed():
+    in_process = sobol_indices(*DESIGN, n_base=512, seed=7, workers=1)
+    pooled = sobol_indices(*DESIGN, n_base=512, seed=7, workers=2, chunk_size=2000)
+    assert pooled == in_process
+
+
+def test_tornado_sorts_infinite_payback_swings_first():
+    rows = tornado(*DESIGN, sort_by="Payback Period (Years)")
+    swings = [row["Payback Period (Years) Swing"] for row in rows]
+    assert math.isinf(swings[0])
+    assert swings == sorted(swings, reverse=True)
+    # Unprofitable at both ends means the payback does not move
+    rows = tornado(20, 51, 35, 1.5, sort_by="Payback Period (Years)")
+    unmoved = [row for row in rows if math.isinf(row["Payback Period (Years) at Low"]) and math.isinf(row["Payback Period (Years) at High"])]
+    assert unmoved and all(row["Payback Period (Years) Swing"] == 0 for row in unmoved)
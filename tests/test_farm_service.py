@@ -0,0 +1,26 @@
+import json
+import math
+
+import pytest
+
+from farm_service import RequestError, _to_json, parse_scenario
+
+FARM = {"cows": 100, "deeded_ha": 51, "grassland_ha": 35, "greenhouse_ha": 1.5}
+
+
+@pytest.mark.parametrize("product", [["Tomato"], {"name": "Tomato"}, 1, "Potato"])
+def test_invalid_product_is_a_client_error(product):
+    with pytest.raises(RequestError):
+        parse_scenario({**FARM, "product": product})
+
+
+@pytest.mark.parametrize("cows", [10 ** 400, math.inf, "100", True])
+def test_numbers_that_are_not_finite_floats_are_client_errors(cows):
+    with pytest.raises(RequestError, match="'cows' must be a finite number"):
+        parse_scenario({**FARM, "cows": cows})
+
+
+def test_non_finite_results_are_sent_as_null():
+    text = _to_json({"Payback Period (Years)": math.inf, "NaN Count": math.nan, "Profit (USD)": -1.0}, "Infinity warning")
+    assert json.loads(text) == {"results": {"Payback Period (Years)": None, "NaN Count": None, "Profit (USD)": -1.0},
+                                "warning": "Infinity warning"}